@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Per-turn latency benchmark for Session.run against offline stand-ins.
+
+Runs Session.run with ScriptedClient/ScriptedCommand over a matrix of hint
+(prompt) sizes and command output sizes, timing each phase of a turn, and
+writes latency percentiles to JSON so releases can be diffed.
+
+    python benchmarks/session_bench.py --turns 50 --output bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.ai.scripted_client import ScriptedClient
+from core.commands import scripted_command
+from core.commands.scripted_command import ScriptedCommand
+from core.models import session as session_module
+from core.models.session import Session
+from core.utils.logger import debug_logger, time_logger
+
+PHASES = [
+    'prompt_build', 'llm_call', 'filter_command', 'execute',
+    'clean_output', '_clean_output', '_is_empty_output', 'got_root'
+]
+
+class PhaseTimer:
+    """Collects wall-clock samples for wrapped callables, keyed by phase"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def wrap(self, phase: str, func):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.samples[phase].append(time.perf_counter() - start)
+        return timed
+
+
+def percentiles(samples: List[float]) -> dict:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        'count': len(ordered),
+        'p50_ms': pick(0.50),
+        'p90_ms': pick(0.90),
+        'p99_ms': pick(0.99),
+        'max_ms': ordered[-1] * 1000,
+        'total_ms': sum(ordered) * 1000,
+    }
+
+
+def make_output(size: int) -> str:
+    line = "-rwxr-xr-x 1 root root 1234 Jan  1 00:00 /usr/bin/example\n"
+    return (line * (size // len(line) + 1))[:size]
+
+
+def run_case(hint_size: int, output_size: int, turns: int, latency: float,
+             prompt_budget, batch_size: int) -> dict:
+    timer = PhaseTimer()
+    client = ScriptedClient(
+        responses=[f"```bash\nls -la /usr/bin/example{i}\n```\nThis lists the file." for i in range(turns)],
+        latency=latency
+    )
+    executor = ScriptedCommand(default=make_output(output_size))
+    session = Session(
+        username='bench', password='bench', system='linux', target='nobody-bench',
+        ai_provider=client, command_executor=executor, max_requests=turns,
+        batch_size=batch_size, prompt_budget=prompt_budget
+    )
+    session.prompt.add_hint("BENCH SCAN FINDINGS\n\n" + make_output(hint_size))
+
+    session.prompt.generate_prompt = timer.wrap('prompt_build', session.prompt.generate_prompt)
+    client.get_response = timer.wrap('llm_call', client.get_response)
+    client.filter_command = timer.wrap('filter_command', client.filter_command)
+    executor.execute = timer.wrap('execute', executor.execute)
+    session._clean_output = timer.wrap('_clean_output', session._clean_output)
+    session._is_empty_output = timer.wrap('_is_empty_output', session._is_empty_output)
+
+    original_clean = scripted_command.clean_output
+    original_got_root = session_module.RootDetector.got_root
+    scripted_command.clean_output = timer.wrap('clean_output', original_clean)
+    session_module.RootDetector.got_root = staticmethod(timer.wrap('got_root', original_got_root))
+    try:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            session.run()
+        wall = time.perf_counter() - start
+    finally:
+        scripted_command.clean_output = original_clean
+        session_module.RootDetector.got_root = staticmethod(original_got_root)
+
+    return {
+        'hint_bytes': hint_size,
+        'output_bytes': output_size,
+        'turns': turns,
+        'wall_s': wall,
+        'per_turn_ms': wall * 1000 / turns,
+        'phases': {phase: percentiles(timer.samples[phase]) for phase in PHASES},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-turn overhead of Session.run')
+    parser.add_argument('--turns', type=int, default=30, help='Turns per case')
+    parser.add_argument('--hint-sizes', type=int, nargs='+',
+                        default=[1024, 16 * 1024, 256 * 1024, 1024 * 1024],
+                        help='Scanner hint sizes in bytes')
+    parser.add_argument('--output-sizes', type=int, nargs='+',
+                        default=[256, 64 * 1024, 1024 * 1024],
+                        help='Command output sizes in bytes')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Simulated LLM latency in seconds')
+    parser.add_argument('--prompt-budget', type=int, default=None,
+                        help='Prompt token budget passed to Session')
+    parser.add_argument('--batch', type=int, default=1, help='Commands per AI request')
+    parser.add_argument('--keep-logging', action='store_true',
+                        help='Keep debug logging enabled (measures its cost too)')
+    parser.add_argument('--output', default='bench_output.json', help='JSON results file')
+    args = parser.parse_args()
+
+    if not args.keep_logging:
+        debug_logger.setLevel(logging.WARNING)
+        time_logger.setLevel(logging.WARNING)
+
+    cases = []
+    for hint_size in args.hint_sizes:
+        for output_size in args.output_sizes:
+            case = run_case(hint_size, output_size, args.turns, args.latency,
+                            args.prompt_budget, args.batch)
+            cases.append(case)
+            print(f"hint={hint_size:>8}B output={output_size:>8}B "
+                  f"per-turn={case['per_turn_ms']:.2f}ms "
+                  f"prompt p50={case['phases']['prompt_build'].get('p50_ms', 0):.2f}ms")
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'settings': vars(args),
+        'cases': cases,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
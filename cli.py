@@ -1,74 +1,187 @@
 #!/usr/bin/env python3
 import argparse
 from core.models.session import Session
-from core.commands.ssh_command import SSHCommand
 from core.commands.local_command import LocalCommand
-from core.ai import get_ai_provider
+from core.commands.scripted_command import ScriptedCommand
+from core.ai import get_ai_provider, CachedClient
+from core.models.fleet import FleetRunner, load_inventory
+from core.utils.tracer import NULL_TRACER, Tracer
 
 def main():
     parser = argparse.ArgumentParser(description='RamiGPT - AI-powered privilege escalation tool')
     parser.add_argument('--host', help='Target host')
     parser.add_argument('--port', type=int, default=22, help='SSH port')
-    parser.add_argument('--username', required=True, help='SSH username')
-    parser.add_argument('--password', required=True, help='SSH password')
-    parser.add_argument('--provider', default='openai', choices=['openai', 'deepseek'], help='AI provider')
+    parser.add_argument('--username', help='SSH username (default for inventory hosts)')
+    parser.add_argument('--password', help='SSH password (default for inventory hosts)')
+    parser.add_argument('--provider', default='openai', choices=['openai', 'deepseek', 'scripted'], help='AI provider')
     parser.add_argument('--max-requests', type=int, default=10, help='Max AI requests')
+    parser.add_argument('--stream', action='store_true',
+                       help='Stream completions and stop as soon as a command arrives')
+    parser.add_argument('--cache', action='store_true',
+                       help='Cache AI responses on disk keyed by prompt hash')
+    parser.add_argument('--cache-dir', default='cache/llm',
+                       help='Directory for cached AI responses')
+    parser.add_argument('--cache-max-mb', type=int, default=64,
+                       help='Evict least recently used responses beyond this size')
+    parser.add_argument('--cache-ttl', type=float, default=None,
+                       help='Seconds before a cached response expires')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Refresh the cache: skip lookups but store new responses (implies --cache)')
+    parser.add_argument('--batch', type=int, default=1,
+                       help='Ask for up to N independent enumeration commands per AI request')
+    parser.add_argument('--prompt-budget', type=int, default=None,
+                       help='Compact the prompt to about this many tokens (off by default)')
+    parser.add_argument('--chat-layout', action='store_true',
+                       help='Send stable prompt prefix and turn data as separate messages')
+    parser.add_argument('--trace-dir',
+                       help='Write a Chrome trace and JSONL span log per session here')
+    parser.add_argument('--conversation', type=int, default=0, metavar='TURNS',
+                       help='Chat-history mode keeping the last TURNS turns as messages')
     parser.add_argument('--debug', action='store_true', help='Enable debug mode')
     parser.add_argument('--scan', choices=['beroot', 'peas', 'all', 'none'],
                        default='all',
                        help='Run security scanners')
     parser.add_argument('--auto', action='store_true', 
                        help='Run full automated escalation')
+    parser.add_argument('--ssh-backend', default='pwntools', choices=['pwntools', 'paramiko'],
+                       help='SSH executor: pwntools, or the lighter paramiko one with connection reuse')
+    parser.add_argument('--ssh-compress', action='store_true',
+                       help='Enable SSH compression (paramiko backend)')
     parser.add_argument('--local', action='store_true',
                        help='Run in local mode (no SSH)')
     parser.add_argument('--target', default='root',
                        help='Target user for escalation')
+    parser.add_argument('--inventory',
+                       help='Fleet mode: file with one "host[:port] [username [password]]" per line')
+    parser.add_argument('--workers', type=int, default=4,
+                       help='Concurrent sessions in fleet mode')
+    parser.add_argument('--results-dir', default='logs/fleet',
+                       help='Directory for per-host result files in fleet mode')
+    parser.add_argument('--playbook',
+                       help='Responses for the scripted provider (JSON list or one per line)')
+    parser.add_argument('--latency', type=float, default=0.0,
+                       help='Simulated response latency of the scripted provider in seconds')
+    parser.add_argument('--fake-target',
+                       help='Run against a scripted fake target (JSON of canned outputs)')
     parser.add_argument('--system', choices=['linux', 'windows'],
                           default='linux', help='Target system type')
     
     args = parser.parse_args()
     
-    # Initialize components
-    ai_provider = get_ai_provider(args.provider)
     # Validate arguments
-    if not args.local and not args.host:
-        parser.error("--host is required when using SSH mode")
+    if args.inventory:
+        if args.local:
+            parser.error("--inventory cannot be combined with --local")
+    else:
+        if args.username is None or args.password is None:
+            parser.error("--username and --password are required without --inventory")
+        if not args.local and not args.fake_target and not args.host:
+            parser.error("--host is required when using SSH mode")
     if args.local and (args.host or args.port != 22 or args.username or args.password):
         print("Warning: SSH arguments ignored in local mode")
 
-    # Initialize command executor
-    if args.local:
-        command_executor = LocalCommand()
-        print("[!] Running in local mode")
-    else:
-        command_executor = SSHCommand(
-            host=args.host,
-            port=args.port,
-            username=args.username,
-            password=args.password
+    if args.inventory:
+        try:
+            targets = load_inventory(args.inventory, args.port, args.username, args.password)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        print(f"[!] Running fleet mode against {len(targets)} targets")
+
+        def session_factory(target):
+            tracer = new_tracer(args)
+            with tracer.activate():
+                command_executor = build_ssh_executor(
+                    args, target.host, target.port, target.username, target.password
+                )
+            return build_session(args, command_executor, target.username, target.password, tracer)
+
+        runner = FleetRunner(
+            targets,
+            session_factory=session_factory,
+            workers=args.workers,
+            results_dir=args.results_dir,
+            prepare=lambda session: run_scanners(session, args.scan)
         )
+        runner.run()
+        return
+
+    # Initialize command executor, tracing the initial connect
+    tracer = new_tracer(args)
+    with tracer.activate():
+        if args.fake_target:
+            command_executor = ScriptedCommand(args.fake_target)
+            print("[!] Running against scripted fake target")
+        elif args.local:
+            command_executor = LocalCommand()
+            print("[!] Running in local mode")
+        else:
+            command_executor = build_ssh_executor(
+                args, args.host, args.port, args.username, args.password
+            )
     
-    session = Session(
-        username=args.username,
-        password=args.password,
+    session = build_session(args, command_executor, args.username, args.password, tracer)
+    try:
+        run_scanners(session, args.scan)
+        session.run()
+    finally:
+        command_executor.close()
+
+def new_tracer(args):
+    # Spans are only collected when there is somewhere to export them
+    return Tracer() if args.trace_dir else NULL_TRACER
+
+def build_ssh_executor(args, host: str, port: int, username: str, password: str):
+    # Imported on demand: pwntools alone takes a noticeable share of startup time
+    if args.ssh_backend == 'paramiko':
+        from core.commands.paramiko_command import ParamikoCommand
+        return ParamikoCommand(host=host, port=port, username=username, password=password,
+                               compress=args.ssh_compress)
+
+    from core.commands.ssh_command import SSHCommand
+    return SSHCommand(host=host, port=port, username=username, password=password)
+
+def build_session(args, command_executor, username: str, password: str, tracer=None) -> Session:
+    # Initialize components
+    provider_kwargs = {'stream': args.stream}
+    if args.provider == 'scripted':
+        provider_kwargs.update(playbook=args.playbook, latency=args.latency)
+    ai_provider = get_ai_provider(args.provider, **provider_kwargs)
+    if args.cache or args.no_cache:
+        ai_provider = CachedClient(
+            ai_provider,
+            cache_dir=args.cache_dir,
+            max_bytes=args.cache_max_mb * 1024 * 1024,
+            ttl=args.cache_ttl,
+            bypass=args.no_cache
+        )
+
+    return Session(
+        username=username,
+        password=password,
         system=args.system,
         target=args.target,
         ai_provider=ai_provider,
         command_executor=command_executor,
         max_requests=args.max_requests,
+        batch_size=args.batch,
+        prompt_budget=args.prompt_budget,
+        chat_layout=args.chat_layout,
+        trace_dir=args.trace_dir,
+        conversation_window=args.conversation,
+        tracer=tracer,
     )
-    
-    if args.scan:
-        if args.scan == 'all':
-            session.auto_escalate()
-        elif args.scan == 'none':
+
+def run_scanners(session: Session, scan: str):
+    if scan:
+        if scan == 'all':
+            # Scanners run beside the AI loop; their hints arrive when they finish
+            session.auto_escalate(background=True)
+        elif scan == 'none':
             print("[!] No scanners will be run.")
         else:
-            session.run_scan(args.scan)
+            session.run_scan(scan)
     else:
-        session.auto_escalate()
-    
-    session.run()
+        session.auto_escalate(background=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
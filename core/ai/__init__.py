@@ -1,9 +1,12 @@
 from .openai_client import OpenAIClient
 from .deepseek_client import DeepSeekClient  # Implement similarly
+from .cached_client import CachedClient
+from .scripted_client import ScriptedClient
 
-def get_ai_provider(name: str):
+def get_ai_provider(name: str, **kwargs):
     providers = {
         'openai': OpenAIClient,
-        'deepseek': DeepSeekClient
+        'deepseek': DeepSeekClient,
+        'scripted': ScriptedClient
     }
-    return providers[name.lower()]()
\ No newline at end of file
+    return providers[name.lower()](**kwargs)
\ No newline at end of file
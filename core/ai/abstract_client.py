@@ -1,10 +1,65 @@
+import asyncio
+import json
+import re
 from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, Iterator, List
+from .command_extractor import CommandExtractor
 
 class AbstractClient(ABC):
+    stream: bool = False
+
     @abstractmethod
     def get_response(self, system_prompt: str, user_prompt: str) -> str:
         pass
 
     @abstractmethod
     def filter_command(self, response: str) -> str:
-        pass
\ No newline at end of file
+        pass
+
+    def get_chat_response(self, messages: List[Dict[str, str]]) -> str:
+        """Send a full message list; by default it is folded into get_response"""
+        system_prompt, user_prompt = self._fold_messages(messages)
+        return self.get_response(system_prompt, user_prompt)
+
+    async def aget_chat_response(self, messages: List[Dict[str, str]]) -> str:
+        system_prompt, user_prompt = self._fold_messages(messages)
+        return await self.aget_response(system_prompt, user_prompt)
+
+    @staticmethod
+    def _fold_messages(messages: List[Dict[str, str]]):
+        system_prompt = "\n".join(m["content"] for m in messages if m["role"] == "system")
+        user_prompt = "\n".join(m["content"] for m in messages if m["role"] != "system")
+        return system_prompt, user_prompt
+
+    def filter_commands(self, response: str, limit: int) -> List[str]:
+        """Extract up to limit ranked commands from a batch (JSON array) response"""
+        match = re.search(r"\[.*\]", response, re.DOTALL)
+        if match:
+            try:
+                commands = json.loads(match.group(0))
+            except ValueError:
+                commands = None
+            if isinstance(commands, list):
+                commands = [str(cmd).strip() for cmd in commands if str(cmd).strip()]
+                if commands:
+                    return commands[:limit]
+
+        # Fall back to the single-command extractor
+        command = self.filter_command(response)
+        return [command] if command else []
+
+    async def aget_response(self, system_prompt: str, user_prompt: str) -> str:
+        """Async counterpart of get_response; falls back to a worker thread"""
+        return await asyncio.to_thread(self.get_response, system_prompt, user_prompt)
+
+    def _read_until_command(self, tokens: Iterator[str]) -> str:
+        """Consume a token stream only until a complete command has arrived"""
+        return CommandExtractor().consume(tokens).strip()
+
+    async def _aread_until_command(self, tokens: AsyncIterator[str]) -> str:
+        """Async variant of _read_until_command"""
+        extractor = CommandExtractor()
+        async for token in tokens:
+            if extractor.feed(token):
+                break
+        return extractor.buffer.strip()
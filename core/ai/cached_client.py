@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional
+from .abstract_client import AbstractClient
+from core.utils.logger import debug_logger
+
+# Eviction brings the cache down to this share of max_bytes, so it runs rarely
+EVICT_TARGET = 0.8
+
+class CachedClient(AbstractClient):
+    """Content-addressed on-disk response cache wrapping any AbstractClient"""
+
+    def __init__(self, client: AbstractClient, cache_dir: str = "cache/llm",
+                 max_bytes: int = 64 * 1024 * 1024, ttl: Optional[float] = None,
+                 bypass: bool = False):
+        self.client = client
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bypass = bypass  # Skip lookups but still refresh stored entries
+        self.model = getattr(client, 'model', type(client).__name__)
+        self.stream = client.stream
+        self._size: Optional[int] = None  # Bytes on disk, counted on the first store
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _key(self, *parts: str) -> str:
+        # A streamed reply stops at the first command, so it is not the full reply
+        mode = "stream" if self.stream else "full"
+        digest = hashlib.sha256()
+        for part in (self.model, mode, *parts):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _lookup(self, key: str) -> Optional[str]:
+        if self.bypass:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if self.ttl is not None and time.time() - entry['created'] > self.ttl:
+            debug_logger.debug(f"Cache entry expired: {key}")
+            self._remove(path)
+            return None
+
+        os.utime(path)  # Mark as recently used for LRU eviction
+        debug_logger.debug(f"Cache hit: {key}")
+        return entry['response']
+
+    def _store(self, key: str, response: str):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({
+                    'model': self.model,
+                    'created': time.time(),
+                    'response': response
+                }, f)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            debug_logger.error(f"Failed to write cache entry: {str(e)}")
+            return
+
+        if self._size is None:
+            self._size = self._evict(self.max_bytes)
+        else:
+            self._size += size
+        if self._size > self.max_bytes:
+            self._size = self._evict(int(self.max_bytes * EVICT_TARGET))
+
+    def _evict(self, limit: int) -> int:
+        """Drop least recently used entries until the cache fits limit; returns its size"""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if total <= limit:
+            return total
+        for _, size, path in sorted(entries):
+            self._remove(path)
+            total -= size
+            if total <= limit:
+                break
+        return total
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def get_response(self, system_prompt: str, user_prompt: str) -> str:
+        key = self._key(system_prompt, user_prompt)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        response = self.client.get_response(system_prompt, user_prompt)
+        self._store(key, response)
+        return response
+
+    async def aget_response(self, system_prompt: str, user_prompt: str) -> str:
+        key = self._key(system_prompt, user_prompt)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        response = await self.client.aget_response(system_prompt, user_prompt)
+        self._store(key, response)
+        return response
+
+    def _messages_key(self, messages: List[Dict[str, str]]) -> str:
+        return self._key(*(f"{m['role']}:{m['content']}" for m in messages))
+
+    def get_chat_response(self, messages: List[Dict[str, str]]) -> str:
+        key = self._messages_key(messages)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        response = self.client.get_chat_response(messages)
+        self._store(key, response)
+        return response
+
+    async def aget_chat_response(self, messages: List[Dict[str, str]]) -> str:
+        key = self._messages_key(messages)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        response = await self.client.aget_chat_response(messages)
+        self._store(key, response)
+        return response
+
+    def filter_command(self, response: str) -> str:
+        return self.client.filter_command(response)
@@ -0,0 +1,54 @@
+import json
+import re
+from typing import Iterable, Optional
+
+class CommandExtractor:
+    """Incrementally consumes streamed tokens and reports when a command is complete"""
+
+    FENCE = "```"
+    INLINE_LINE = re.compile(r"`[^`\n]+`")  # A line that is nothing but inline code
+
+    def __init__(self):
+        self.buffer = ""
+        self.complete = False
+
+    def feed(self, token: str) -> bool:
+        """Append a token and return True once a full command has arrived"""
+        if self.complete or not token:
+            return self.complete
+        self.buffer += token
+        self.complete = self._has_command()
+        return self.complete
+
+    def _has_command(self) -> bool:
+        """True only once the buffer holds what every extractor would take as the command
+
+        Anything less certain (e.g. a prose first line) waits for the full
+        stream, since the command may still follow in a fence.
+        """
+        fences = self.buffer.count(self.FENCE)
+        if fences >= 2:
+            return True  # Closed fenced block
+        if fences == 1:
+            return False  # Still inside an open fence
+
+        # Only judge text that has been terminated by a newline
+        terminated = self.buffer[:self.buffer.rfind("\n") + 1]
+        if terminated.lstrip().startswith("["):
+            # Batch responses are JSON arrays that may span several lines
+            return self._is_json_array(terminated)
+        return any(self.INLINE_LINE.fullmatch(line.strip()) for line in terminated.split("\n"))
+
+    @staticmethod
+    def _is_json_array(text: str) -> bool:
+        try:
+            return isinstance(json.loads(text), list)
+        except ValueError:
+            return False
+
+    def consume(self, tokens: Iterable[Optional[str]]) -> str:
+        """Read tokens until a command is complete, returning the text seen so far"""
+        for token in tokens:
+            if self.feed(token or ""):
+                break
+        return self.buffer
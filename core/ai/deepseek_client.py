@@ -1,42 +1,207 @@
 from .abstract_client import AbstractClient
 import requests
+import httpx
+from requests.adapters import HTTPAdapter
 import os
+import json
 from dotenv import load_dotenv
-from typing import Optional
+from typing import Optional, Iterator, AsyncIterator
+from core.utils.logger import debug_logger
+from core.utils.rate_limiter import RateLimiter
+from core.utils.tokens import estimate_tokens
+from core.utils.tracer import span
 
 class DeepSeekClient(AbstractClient):
-    def __init__(self):
+    def __init__(self, pool_size: Optional[int] = None,
+                 connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None,
+                 warm_up: bool = True, stream: bool = False):
         load_dotenv()
         self.api_key = os.getenv("DEEPSEEK_API_KEY")
         self.base_url = "https://api.deepseek.com/v1"
         self.model = "deepseek-chat"  # Can be configured via settings
-    
-    def get_response(self, system_prompt: str, user_prompt: str) -> str:
-        headers = {
+        self.pool_size = pool_size or int(os.getenv("DEEPSEEK_POOL_SIZE", "4"))
+        self.timeout = (
+            connect_timeout or float(os.getenv("DEEPSEEK_CONNECT_TIMEOUT", "5")),
+            read_timeout or float(os.getenv("DEEPSEEK_READ_TIMEOUT", "120"))
+        )
+        self.stream = stream
+        self.max_retries = int(os.getenv("DEEPSEEK_MAX_RETRIES", "3"))
+        self.rate_limiter = RateLimiter.for_provider("deepseek")
+        self.http = self._create_session()
+        self.ahttp: Optional[httpx.AsyncClient] = None
+        if warm_up:
+            self._warm_up()
+
+    def _create_session(self) -> requests.Session:
+        """Create a keep-alive session reused for every request"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(self._headers())
+        return session
+
+    def _headers(self) -> dict:
+        return {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
-        
-        payload = {
+
+    def _warm_up(self):
+        """Open the TCP/TLS connection ahead of the first completion"""
+        try:
+            self.http.head(self.base_url, timeout=self.timeout)
+        except requests.RequestException as e:
+            debug_logger.debug(f"DeepSeek warm-up failed: {str(e)}")
+    
+    def _create_async_session(self) -> httpx.AsyncClient:
+        """Async keep-alive client; created lazily inside the running loop"""
+        return httpx.AsyncClient(
+            headers=self._headers(),
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size
+            ),
+            timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0])
+        )
+
+    def _build_payload(self, messages: list) -> dict:
+        return {
             "model": self.model,
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
+            "messages": messages,
             "temperature": 0.7,
             "max_tokens": 2000
         }
-        
-        try:
-            response = requests.post(
+
+    def _estimate_request_tokens(self, payload: dict) -> int:
+        prompt = "".join(message["content"] for message in payload["messages"])
+        return estimate_tokens(prompt) + payload["max_tokens"]
+
+    def _post(self, payload: dict, stream: bool = False) -> requests.Response:
+        """POST a completion through the shared rate limiter, retrying on 429"""
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(self._estimate_request_tokens(payload))
+            with span("http.request", attempt=attempt, stream=stream) as request_span:
+                response = self.http.post(
+                    f"{self.base_url}/chat/completions",
+                    json={**payload, "stream": stream},
+                    timeout=self.timeout,
+                    stream=stream
+                )
+                request_span.set(status=response.status_code)
+            retry_after = self.rate_limiter.update_from_headers(response.headers)
+            if response.status_code == 429 and attempt < self.max_retries:
+                response.close()
+                if retry_after is None:
+                    self.rate_limiter.penalize(2 ** attempt)
+                continue
+            response.raise_for_status()
+            return response
+
+    async def _apost(self, payload: dict, stream: bool = False) -> httpx.Response:
+        if self.ahttp is None:
+            self.ahttp = self._create_async_session()
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.aacquire(self._estimate_request_tokens(payload))
+            request = self.ahttp.build_request(
+                "POST",
                 f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload
+                json={**payload, "stream": stream}
             )
+            with span("http.request", attempt=attempt, stream=stream) as request_span:
+                response = await self.ahttp.send(request, stream=stream)
+                request_span.set(status=response.status_code)
+            retry_after = self.rate_limiter.update_from_headers(response.headers)
+            if response.status_code == 429 and attempt < self.max_retries:
+                await response.aclose()
+                if retry_after is None:
+                    self.rate_limiter.penalize(2 ** attempt)
+                continue
             response.raise_for_status()
+            return response
+
+    def get_response(self, system_prompt: str, user_prompt: str) -> str:
+        return self.get_chat_response([
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ])
+
+    def get_chat_response(self, messages: list) -> str:
+        payload = self._build_payload(messages)
+        
+        try:
+            if self.stream:
+                tokens = self._stream_tokens(payload)
+                try:
+                    return self._read_until_command(tokens)
+                finally:
+                    tokens.close()
+
+            response = self._post(payload)
             return response.json()["choices"][0]["message"]["content"]
         except Exception as e:
             raise Exception(f"DeepSeek API request failed: {str(e)}")
+
+    def _stream_tokens(self, payload: dict) -> Iterator[str]:
+        """Yield completion deltas from the SSE stream, closing it when abandoned"""
+        response = self._post(payload, stream=True)
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                delta = self._parse_event(line)
+                if delta is None:
+                    break
+                if delta:
+                    yield delta
+        finally:
+            response.close()
+
+    async def aget_response(self, system_prompt: str, user_prompt: str) -> str:
+        return await self.aget_chat_response([
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ])
+
+    async def aget_chat_response(self, messages: list) -> str:
+        payload = self._build_payload(messages)
+
+        try:
+            if self.stream:
+                tokens = self._astream_tokens(payload)
+                try:
+                    return await self._aread_until_command(tokens)
+                finally:
+                    await tokens.aclose()
+
+            response = await self._apost(payload)
+            return response.json()["choices"][0]["message"]["content"]
+        except Exception as e:
+            raise Exception(f"DeepSeek API request failed: {str(e)}")
+
+    async def _astream_tokens(self, payload: dict) -> AsyncIterator[str]:
+        response = await self._apost(payload, stream=True)
+        try:
+            async for line in response.aiter_lines():
+                delta = self._parse_event(line)
+                if delta is None:
+                    break
+                if delta:
+                    yield delta
+        finally:
+            await response.aclose()
+
+    def _parse_event(self, line: str) -> Optional[str]:
+        """Return the content delta of an SSE line, or None at end of stream"""
+        if not line or not line.startswith("data:"):
+            return ""
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return None
+        delta = json.loads(data)["choices"][0].get("delta", {})
+        return delta.get("content") or ""
     
     def filter_command(self, response: str) -> str:
         """Extracts the command from DeepSeek's response"""
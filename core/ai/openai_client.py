@@ -1,22 +1,120 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI, RateLimitError
 import os
 from dotenv import load_dotenv
+from typing import AsyncIterator, Iterator
 from .abstract_client import AbstractClient
+from core.utils.rate_limiter import RateLimiter
+from core.utils.tokens import estimate_tokens
 
 class OpenAIClient(AbstractClient):
-    def __init__(self):
+    def __init__(self, stream: bool = False):
         load_dotenv()
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.model = "gpt-3.5-turbo"
+        # Retries go through the shared rate limiter, not the SDK's own backoff
+        self.max_retries = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+        self.aclient = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+        self.stream = stream
+        self.rate_limiter = RateLimiter.for_provider("openai")
     
+    def _estimate_request_tokens(self, messages: list) -> int:
+        return estimate_tokens("".join(message["content"] for message in messages))
+
+    def _create(self, messages: list, stream: bool = False):
+        """Create a completion through the shared rate limiter, retrying on 429"""
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(self._estimate_request_tokens(messages))
+            try:
+                raw = self.client.chat.completions.with_raw_response.create(
+                    model=self.model,
+                    messages=messages,
+                    stream=stream
+                )
+            except RateLimitError as e:
+                # The SDK raises before a raw response exists, so take Retry-After from the error
+                if not self._retry_after_limit(e, attempt):
+                    raise
+                continue
+            self.rate_limiter.update_from_headers(raw.headers)
+            return raw.parse()
+
+    async def _acreate(self, messages: list, stream: bool = False):
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.aacquire(self._estimate_request_tokens(messages))
+            try:
+                raw = await self.aclient.chat.completions.with_raw_response.create(
+                    model=self.model,
+                    messages=messages,
+                    stream=stream
+                )
+            except RateLimitError as e:
+                if not self._retry_after_limit(e, attempt):
+                    raise
+                continue
+            self.rate_limiter.update_from_headers(raw.headers)
+            return raw.parse()
+
+    def _retry_after_limit(self, error: RateLimitError, attempt: int) -> bool:
+        """Feed a 429 to the limiter; True if the request should be retried"""
+        retry_after = self.rate_limiter.update_from_headers(error.response.headers)
+        if attempt >= self.max_retries:
+            return False
+        if retry_after is None:
+            self.rate_limiter.penalize(2 ** attempt)
+        return True
+
     def get_response(self, system_prompt: str, user_prompt: str) -> str:
-        completion = self.client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        )
+        return self.get_chat_response([
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ])
+
+    def get_chat_response(self, messages: list) -> str:
+        if self.stream:
+            tokens = self._stream_tokens(messages)
+            try:
+                return self._read_until_command(tokens)
+            finally:
+                tokens.close()
+
+        completion = self._create(messages)
         return completion.choices[0].message.content.strip()
+
+    def _stream_tokens(self, messages: list) -> Iterator[str]:
+        """Yield completion deltas, closing the HTTP stream when abandoned"""
+        stream = self._create(messages, stream=True)
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            stream.close()
+
+    async def aget_response(self, system_prompt: str, user_prompt: str) -> str:
+        return await self.aget_chat_response([
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ])
+
+    async def aget_chat_response(self, messages: list) -> str:
+        if self.stream:
+            tokens = self._astream_tokens(messages)
+            try:
+                return await self._aread_until_command(tokens)
+            finally:
+                await tokens.aclose()
+
+        completion = await self._acreate(messages)
+        return completion.choices[0].message.content.strip()
+
+    async def _astream_tokens(self, messages: list) -> AsyncIterator[str]:
+        stream = await self._acreate(messages, stream=True)
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
     
     def filter_command(self, response: str) -> str:
         # Implement OpenAI-specific command filtering
@@ -24,4 +122,4 @@ class OpenAIClient(AbstractClient):
         pattern = r"```(?:bash\s)?(.*?)```|`(?:bash\s)?(.*?)`|'(.*?)'"
         matches = re.findall(pattern, response, re.DOTALL)
         commands = [cmd.strip() for group in matches for cmd in group if cmd.strip()]
-        return commands[0] if commands else response.strip()
\ No newline at end of file
+        return commands[0] if commands else response.strip()
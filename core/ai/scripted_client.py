@@ -0,0 +1,82 @@
+import asyncio
+import json
+import os
+import re
+import time
+from typing import AsyncIterator, Iterator, List, Optional
+from .abstract_client import AbstractClient
+
+# Words with their trailing whitespace, as a stand-in for model tokens
+TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+
+class ScriptedClient(AbstractClient):
+    """Deterministic offline provider that replays responses from a playbook
+
+    The playbook is a JSON list of responses or a text file with one response
+    per line. Responses are returned in order and cycle once exhausted.
+    """
+
+    def __init__(self, playbook: Optional[str] = None, responses: Optional[List[str]] = None,
+                 latency: Optional[float] = None, stream: bool = False,
+                 token_delay: float = 0.0):
+        self.model = "scripted"
+        self.responses = responses or self._load_playbook(playbook or os.getenv("SCRIPTED_PLAYBOOK"))
+        self.latency = latency if latency is not None else float(os.getenv("SCRIPTED_LATENCY", "0"))
+        self.stream = stream
+        self.token_delay = token_delay  # Per-token delay when streaming
+        self.calls = 0
+
+    @staticmethod
+    def _load_playbook(path: Optional[str]) -> List[str]:
+        if not path:
+            raise ValueError("ScriptedClient requires a playbook (SCRIPTED_PLAYBOOK or --playbook)")
+        with open(path, 'r') as f:
+            content = f.read()
+        if path.endswith('.json'):
+            return [str(response) for response in json.loads(content)]
+        return [line for line in content.splitlines() if line.strip()]
+
+    def _next_response(self) -> str:
+        response = self.responses[self.calls % len(self.responses)]
+        self.calls += 1
+        return response
+
+    def _tokens(self, response: str) -> Iterator[str]:
+        for token in TOKEN_PATTERN.findall(response):
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            yield token
+
+    async def _atokens(self, response: str) -> AsyncIterator[str]:
+        for token in TOKEN_PATTERN.findall(response):
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield token
+
+    def get_response(self, system_prompt: str, user_prompt: str) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        response = self._next_response()
+        if self.stream:
+            return self._read_until_command(self._tokens(response))
+        return response
+
+    async def aget_response(self, system_prompt: str, user_prompt: str) -> str:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        response = self._next_response()
+        if self.stream:
+            return await self._aread_until_command(self._atokens(response))
+        return response
+
+    def filter_command(self, response: str) -> str:
+        code_block_match = re.search(r"```(?:\w+)?\n?(.*?)\n?```", response, re.DOTALL)
+        if code_block_match:
+            return code_block_match.group(1).strip()
+
+        inline_code_match = re.search(r"`([^`]+)`", response)
+        if inline_code_match:
+            return inline_code_match.group(1).strip()
+
+        lines = [line.strip() for line in response.split('\n') if line.strip()]
+        return lines[0] if lines else ""
@@ -1,14 +1,63 @@
+import asyncio
 from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
 
 class AbstractCommand(ABC):
+    # Whether independent commands may run at the same time on this executor
+    supports_concurrency: bool = False
+    # Whether exec_command runs on its own channel, independent of the shell
+    supports_exec_channels: bool = False
+    # Identifies the target machine, e.g. in the scanner tool cache index
+    host_id: str = "local"
+    # Full text of outputs too long for the truncated view returned by execute
+    output_store = None
+
     @abstractmethod
     def execute(self, command: str) -> str:
         pass
     
+    async def aexecute(self, command: str) -> str:
+        """Async counterpart of execute; falls back to a worker thread"""
+        return await asyncio.to_thread(self.execute, command)
+    
+    def execute_many(self, commands: List[str]) -> List[str]:
+        """Run a batch of independent commands, returning one output per command
+
+        Executors that can send the batch in a single round trip override this.
+        """
+        return [self.execute(command) for command in commands]
+    
+    async def aexecute_many(self, commands: List[str]) -> List[str]:
+        """Async counterpart of execute_many; falls back to a worker thread"""
+        return await asyncio.to_thread(self.execute_many, commands)
+    
+    def exec_command(self, command: str, timeout: int = 300) -> str:
+        """Run a non-interactive command (scanners, chmod) outside the interactive shell
+
+        Executors without separate channels run it through execute.
+        """
+        return self.execute(command)
+    
+    def read_output(self, handle: int, start: int = 0, end: Optional[int] = None) -> str:
+        """Character range of a command output that execute returned truncated"""
+        if self.output_store is None:
+            return ""
+        return self.output_store.read(handle, start, end)
+    
+    def take_late_output(self) -> List[Tuple[str, str]]:
+        """(command, output) pairs for output that arrived after a command returned"""
+        return []
+    
+    def close(self):
+        """Release connections and other resources held for the target"""
+        if self.output_store is not None:
+            self.output_store.close()
+    
     @abstractmethod
-    def upload(self, local_path: str, remote_path: str) -> bool:
+    def upload(self, local_path: str, remote_path: str, check: bool = True) -> bool:
+        """Place a file or directory remotely; check=False skips the up-to-date check"""
         pass
     
     @abstractmethod
     def download_file(self, remote_path: str, local_path: str) -> bool:
-        pass
\ No newline at end of file
+        pass
@@ -0,0 +1,424 @@
+import asyncio
+import time
+from abc import abstractmethod
+from typing import List, Optional, Tuple
+from .abstract_command import AbstractCommand
+from .transfer import UploadPlan
+from .framing import (SHELL_SETUP, new_token, frame_command, frame_script, frame_matcher,
+                      extract_output, parse_end, split_frames, strip_markers, strip_prompts)
+from core.utils.logger import debug_logger
+from core.utils.tracer import span
+from core.utils.cleaner import clean_output
+from core.utils.receive_buffer import ReceiveBuffer, TRAILING_PASSWORD, TRAILING_PROMPT
+from core.utils.output_capture import OutputCapture, OutputStore, bounded_view, default_max_output
+
+# Seconds a trailing prompt must stay quiet before it ends a framed command
+PROMPT_SETTLE_TIME = 2.0
+
+# Seconds a trailing password prompt must stay quiet before it is answered
+PASSWORD_SETTLE_TIME = 1.0
+
+# Upper bound on bytes taken by one pre-command drain
+DRAIN_LIMIT = 1 << 20
+
+class FramedShellCommand(AbstractCommand):
+    """Runs commands in a remote interactive shell, framed by begin/end markers
+
+    Subclasses provide the transport: connect(), _recv() and _send_line(),
+    plus _exec_with_input() and _upload_plain() for uploads. Those that also
+    implement _arecv() set supports_async_io, and aexecute then waits for
+    output on the event loop instead of in a worker thread.
+    """
+
+    # Whether _arecv waits on the event loop (otherwise aexecute uses a thread)
+    supports_async_io: bool = False
+
+    def __init__(self, host: str, port: int, username: str, password: str,
+                 max_output: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.host_id = f"{username}@{host}:{port}"
+        self.last_exit_status = None
+        self.last_exit_statuses: List[Optional[int]] = []
+        self._pending_token = None  # Frame waiting for interactive input
+        self._last_command = None
+        self._late_output: List[Tuple[str, str]] = []
+        self.max_output = max_output or default_max_output()
+        self.output_store = OutputStore()
+
+    @abstractmethod
+    def connect(self):
+        pass
+
+    @abstractmethod
+    def _recv(self, timeout: float) -> bytes:
+        """Bytes from the shell, b'' if none arrive in time; EOFError once it is closed"""
+        pass
+
+    async def _arecv(self, timeout: float) -> bytes:
+        """Event-loop counterpart of _recv, for transports with supports_async_io"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _send_line(self, data: bytes):
+        pass
+
+    @abstractmethod
+    def _exec_with_input(self, command: str, data: bytes) -> Tuple[Optional[int], str]:
+        """Run command on its own channel with data as stdin; (exit status or None if unknown, output)"""
+        pass
+
+    @abstractmethod
+    def _upload_plain(self, local_path: str, remote_path: str):
+        pass
+
+    def _receive_until(self, buffer: ReceiveBuffer, timeout=300, on_idle=None):
+        """Read into buffer until its matcher fires; None on timeout or EOF
+
+        on_idle(buffer, idle_seconds) is consulted while no data arrives and
+        may end the wait by returning a match of its own.
+        """
+        active = False  # Track if we're seeing active command output
+        last_data_time = time.time()
+
+        while True:
+            try:
+                # Check overall timeout
+                if time.time() - last_data_time > timeout:
+                    debug_logger.warning(f"Timeout after {timeout}s of inactivity")
+                    return None
+
+                # Receive data with short timeout
+                data = self._recv(timeout=0.5)
+                if not data:
+                    if active:  # Only log if we had output before
+                        debug_logger.debug("No data received, waiting...")
+                    if on_idle:
+                        found = on_idle(buffer, time.time() - last_data_time)
+                        if found is not None:
+                            return found
+                    continue
+
+                last_data_time = time.time()
+                active = True
+
+                # Only the newly received tail is scanned
+                found = buffer.feed(data)
+                if found is not None:
+                    return found
+
+            except EOFError:
+                debug_logger.error("Shell connection terminated")
+                self.connect()
+                return None
+            except Exception as e:
+                debug_logger.error(f"Receive error: {str(e)}")
+                continue
+
+    async def _areceive_until(self, buffer: ReceiveBuffer, timeout=300, on_idle=None):
+        """_receive_until on the event loop: waits in _arecv, never in a thread"""
+        last_data_time = time.time()
+
+        while True:
+            try:
+                if time.time() - last_data_time > timeout:
+                    debug_logger.warning(f"Timeout after {timeout}s of inactivity")
+                    return None
+
+                data = await self._arecv(timeout=0.5)
+                if not data:
+                    if on_idle:
+                        found = on_idle(buffer, time.time() - last_data_time)
+                        if found is not None:
+                            return found
+                    continue
+
+                last_data_time = time.time()
+                found = buffer.feed(data)
+                if found is not None:
+                    return found
+
+            except EOFError:
+                debug_logger.error("Shell connection terminated")
+                await asyncio.to_thread(self.connect)  # Rare, and connecting blocks
+                return None
+            except Exception as e:
+                debug_logger.error(f"Receive error: {str(e)}")
+                continue
+
+    def _wait_for_frame(self, token: str, accept_prompt: bool = False, timeout=300,
+                        capture: Optional[OutputCapture] = None) -> str:
+        """Wait for a framed command's end marker and return its exact output"""
+        buffer = ReceiveBuffer(frame_matcher(token, accept_prompt), capture)
+        try:
+            found = self._receive_until(buffer, timeout, on_idle=self._settled_prompt)
+        finally:
+            buffer.capture.close()
+        output, reopened = self._frame_output(buffer, found, token)
+        if reopened:
+            self._setup_shell()
+        return output
+
+    async def _await_frame(self, token: str, accept_prompt: bool = False, timeout=300,
+                           capture: Optional[OutputCapture] = None) -> str:
+        """Async counterpart of _wait_for_frame"""
+        buffer = ReceiveBuffer(frame_matcher(token, accept_prompt), capture)
+        try:
+            found = await self._areceive_until(buffer, timeout, on_idle=self._settled_prompt)
+        finally:
+            buffer.capture.close()
+        output, reopened = self._frame_output(buffer, found, token)
+        if reopened:
+            await self._asetup_shell()
+        return output
+
+    def _frame_output(self, buffer: ReceiveBuffer, found, token: str) -> Tuple[str, bool]:
+        """(output, whether a new shell opened and needs setting up) of a finished wait"""
+        if found is None:
+            self.last_exit_status = None
+            return extract_output(buffer.text(), token), False
+
+        kind, offset, match = found
+        if kind == 'end':
+            self.last_exit_status = parse_end(match)
+            return extract_output(buffer.text(offset), token), False
+
+        if kind == 'prompt':
+            # The input started a new shell (e.g. su succeeded); set it up for framing
+            self.last_exit_status = None
+            return extract_output(buffer.text(offset), token), True
+
+        # Keep the frame open: the next input answers this prompt
+        debug_logger.debug("Detected password prompt")
+        self._pending_token = token
+        return 'PASSWORD PROMPT!', False
+
+    @staticmethod
+    def _settled_prompt(buffer: ReceiveBuffer, idle: float):
+        """A prompt that stays last for a while ends the wait without an end marker
+
+        A password prompt means the command is waiting for input; a shell
+        prompt means it opened a new shell (e.g. 'sudo su' or a SUID 'sh -p')
+        and the end marker will not come.
+        """
+        if idle >= PASSWORD_SETTLE_TIME:
+            found = buffer.match_tail(TRAILING_PASSWORD)
+            if found is not None:
+                return found
+        if idle < PROMPT_SETTLE_TIME:
+            return None
+        return buffer.match_tail(TRAILING_PROMPT)
+
+    def _setup_shell(self):
+        # Setting up the shell is not a command; its status is not reported
+        status = self.last_exit_status
+        token = new_token()
+        self._send_line(frame_command(SHELL_SETUP, token).encode())
+        self._wait_for_frame(token)
+        self.last_exit_status = status
+
+    async def _asetup_shell(self):
+        status = self.last_exit_status
+        token = new_token()
+        self._send_line(frame_command(SHELL_SETUP, token).encode())
+        await self._await_frame(token)
+        self.last_exit_status = status
+
+    def execute(self, command: str) -> str:
+        if not self.shell:
+            self.connect()
+
+        try:
+            token, accept_prompt = self._send_command(command)
+            output = self._wait_for_frame(token, accept_prompt, capture=self._new_capture())
+            return self._command_output(output)
+
+        except Exception as e:
+            debug_logger.error(f"Command execution failed: {str(e)}")
+            self.connect()  # Attempt to reconnect
+            raise
+
+    async def aexecute(self, command: str) -> str:
+        if not self.supports_async_io:
+            return await super().aexecute(command)
+        if not self.shell:
+            await asyncio.to_thread(self.connect)
+
+        try:
+            token, accept_prompt = self._send_command(command)
+            output = await self._await_frame(token, accept_prompt, capture=self._new_capture())
+            return self._command_output(output)
+
+        except Exception as e:
+            debug_logger.error(f"Command execution failed: {str(e)}")
+            await asyncio.to_thread(self.connect)  # Attempt to reconnect
+            raise
+
+    def _send_command(self, command: str) -> Tuple[str, bool]:
+        """Send a command, or input to an open prompt; (frame token, whether a new shell may answer)"""
+        self._collect_late_output()
+        self._last_command = command
+
+        if self._pending_token:
+            # Raw input for an interactive prompt inside the open frame
+            token, self._pending_token = self._pending_token, None
+            self._send_line(command.encode())
+            debug_logger.debug("Input sent to interactive prompt")
+            return token, True
+
+        token = new_token()
+        self._send_line(frame_command(command, token).encode())
+        debug_logger.debug(f"Command sent: {command}")
+        return token, False
+
+    @staticmethod
+    def _command_output(output: str) -> str:
+        output = clean_output(output)
+        debug_logger.debug(f"Command output: {output[:200]}...")  # Log first 200 chars
+        return output
+
+    def execute_many(self, commands: List[str]) -> List[str]:
+        """Send a batch as one framed script and split the output per command
+
+        Meant for non-interactive commands; a password prompt stops the
+        batch and leaves the frame open for the next input, as in execute.
+        """
+        if len(commands) < 2 or self._pending_token:
+            return super().execute_many(commands)
+        if not self.shell:
+            self.connect()
+
+        try:
+            token, buffer = self._send_batch(commands)
+            try:
+                found = self._receive_until(buffer, on_idle=self._settled_prompt)
+            finally:
+                buffer.capture.close()
+            outputs, reopened = self._batch_outputs(buffer, found, token, len(commands))
+            if reopened:
+                self._setup_shell()
+            return outputs
+
+        except Exception as e:
+            debug_logger.error(f"Batch execution failed: {str(e)}")
+            self.connect()  # Attempt to reconnect
+            raise
+
+    async def aexecute_many(self, commands: List[str]) -> List[str]:
+        if not self.supports_async_io:
+            return await super().aexecute_many(commands)
+        if len(commands) < 2 or self._pending_token:
+            return [await self.aexecute(command) for command in commands]
+        if not self.shell:
+            await asyncio.to_thread(self.connect)
+
+        try:
+            token, buffer = self._send_batch(commands)
+            try:
+                found = await self._areceive_until(buffer, on_idle=self._settled_prompt)
+            finally:
+                buffer.capture.close()
+            outputs, reopened = self._batch_outputs(buffer, found, token, len(commands))
+            if reopened:
+                await self._asetup_shell()
+            return outputs
+
+        except Exception as e:
+            debug_logger.error(f"Batch execution failed: {str(e)}")
+            await asyncio.to_thread(self.connect)  # Attempt to reconnect
+            raise
+
+    def _send_batch(self, commands: List[str]) -> Tuple[str, ReceiveBuffer]:
+        self._collect_late_output()
+        self._last_command = commands[-1]
+
+        token = new_token()
+        self._send_line(frame_command(frame_script(commands, token), token).encode())
+        debug_logger.debug(f"Batch of {len(commands)} commands sent")
+
+        capture = self.output_store.new_capture(self.max_output * len(commands))
+        return token, ReceiveBuffer(frame_matcher(token), capture)
+
+    def _batch_outputs(self, buffer: ReceiveBuffer, found, token: str,
+                       count: int) -> Tuple[List[str], bool]:
+        """(one output per command, whether a new shell opened) of a finished batch"""
+        capture = buffer.capture
+        kind = found[0] if found else None
+        parts = split_frames(buffer.text(found[1] if kind in ('end', 'prompt') else None),
+                             token, count)
+        if kind == 'password':
+            debug_logger.debug("Detected password prompt in batch")
+            self._pending_token = token
+
+        outputs = []
+        for output, status in parts:
+            if output is None:
+                # Never started, or its frame fell in the omitted middle of the batch
+                output = f"[output omitted; full batch is output #{capture.handle}]" if capture.omitted else ""
+            elif kind == 'password' and status is None:
+                output = 'PASSWORD PROMPT!'
+            else:
+                output = clean_output(bounded_view(strip_markers(output), self.max_output))
+            outputs.append(output)
+        self.last_exit_statuses = [status for _, status in parts]
+        self.last_exit_status = self.last_exit_statuses[-1]
+        return outputs, kind == 'prompt'
+
+    def _collect_late_output(self):
+        """Output still buffered from the previous command belongs to it"""
+        late = self._drain()
+        if late and self._last_command:
+            # The prompt a shell prints after each command is not output
+            text = strip_prompts(clean_output(strip_markers(late.decode('utf-8', errors='ignore'))))
+            if text:
+                self._late_output.append((self._last_command, text))
+
+    def _new_capture(self) -> OutputCapture:
+        return self.output_store.new_capture(self.max_output)
+
+    def _drain(self) -> bytes:
+        """Take what the shell has already sent without waiting for more"""
+        chunks = []
+        size = 0
+        while size < DRAIN_LIMIT:
+            data = self._recv(timeout=0)
+            if not data:
+                break
+            chunks.append(data)
+            size += len(data)
+        return b''.join(chunks)
+
+    def take_late_output(self) -> List[Tuple[str, str]]:
+        late, self._late_output = self._late_output, []
+        return late
+
+    def upload(self, local_path: str, remote_path: str, check: bool = True) -> bool:
+        """Send a file or directory as one gzipped tar stream, unless the remote copy is current
+
+        Callers that already know the copy is missing pass check=False to save
+        the round trip. Targets without tar (e.g. Windows) fall back to a plain
+        transfer.
+        """
+        try:
+            plan = UploadPlan(local_path, remote_path)
+            with span("upload", path=local_path) as upload_span:
+                if check and self.exec_command(plan.check_command()).strip() == plan.digest:
+                    debug_logger.debug(f"Upload skipped, {plan.target} is up to date")
+                    upload_span.set(skipped=True)
+                    return True
+
+                archive = plan.archive()
+                upload_span.set(skipped=False, bytes_out=len(archive))
+                status, message = self._exec_with_input(plan.extract_command(), archive)
+                if status is None:
+                    # No exit status came back; the manifest shows whether extraction finished
+                    status = 0 if self.exec_command(plan.check_command()).strip() == plan.digest else 1
+                if status != 0:
+                    debug_logger.warning(f"Tar upload failed ({message.strip()}), sending plainly")
+                    self._upload_plain(local_path, remote_path)
+            return True
+        except Exception as e:
+            debug_logger.error(f"Upload failed: {str(e)}")
+            return False
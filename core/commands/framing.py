@@ -0,0 +1,91 @@
+import re
+import uuid
+from typing import List, Optional, Pattern, Tuple
+from core.utils.receive_buffer import PROMPT_PATTERN
+
+# Shell setup that keeps framed output free of echo and terminal escapes
+SHELL_SETUP = "export TERM=dumb; stty -echo 2>/dev/null"
+
+def new_token() -> str:
+    return uuid.uuid4().hex[:12]
+
+def begin_marker(token: str) -> str:
+    return f"__CS_BEGIN_{token}__"
+
+def frame_command(command: str, token: str) -> str:
+    """Wrap a command between begin/end markers, the end one carrying $?
+
+    The markers are assembled by printf so an echoed command line never
+    contains them verbatim, and the command sits in a brace group so the
+    end marker is parsed before the command runs and cannot be swallowed
+    as input by an interactive program (e.g. su reading a password).
+    """
+    return (
+        f"printf '__CS_%s_{token}__\\n' BEGIN; {{\n"
+        f"{command}\n"
+        f"}}; printf '\\n__CS_%s_{token}_%s__\\n' END \"$?\""
+    )
+
+def sub_token(token: str, index: int) -> str:
+    # A hex digit follows the batch token, so sub-markers never match the batch frame
+    return f"{token}{index:x}"
+
+def frame_script(commands: List[str], token: str) -> str:
+    """Frame each command of a batch with its own markers, to run as one script"""
+    return "\n".join(frame_command(command, sub_token(token, i)) for i, command in enumerate(commands))
+
+def split_frames(text: str, token: str, count: int) -> List[Tuple[Optional[str], Optional[int]]]:
+    """Demultiplex a framed batch into (output, exit status) per command
+
+    A command whose end marker is missing (cut off, or lost in the omitted
+    middle of a bounded capture) gets its output up to the next frame and no
+    status; one that never started gets (None, None).
+    """
+    results: List[Tuple[Optional[str], Optional[int]]] = [(None, None)] * count
+    pattern = re.compile(
+        rf'__CS_BEGIN_{token}([0-9a-f]+)__\r?\n(.*?)'
+        rf'(?:\r?\n__CS_END_{token}\1_(\d+)__|(?=\r?\n?__CS_BEGIN_{token}[0-9a-f]+__)|\Z)',
+        re.S
+    )
+    for match in pattern.finditer(text):
+        index = int(match.group(1), 16)
+        if index < count:
+            status = int(match.group(3)) if match.group(3) is not None else None
+            results[index] = (match.group(2).strip('\r\n'), status)
+    return results
+
+def frame_matcher(token: str, accept_prompt: bool = False) -> Pattern:
+    """Match the end marker of a frame (or, optionally, a fresh shell prompt)
+
+    Password prompts are not matched here: text like 'password:' is common
+    in output, so only one left waiting at the tail counts (see FramedShellCommand).
+    """
+    pattern = rf'(?P<end>__CS_END_{token}_(?P<status>\d+)__)'
+    if accept_prompt:
+        pattern += r'|' + PROMPT_PATTERN
+    return re.compile(pattern)
+
+# Markers of other frames: ends abandoned when a command opened a nested
+# shell, and batch sub-frames that ran after a prompt was answered
+STALE_MARKER = re.compile(r'\r?\n?__CS_(?:BEGIN_[0-9a-f]+|END_[0-9a-f]+_\d+)__\r?\n?')
+
+def extract_output(text: str, token: str) -> str:
+    """Output between the begin marker line and the end marker"""
+    begin = begin_marker(token)
+    start = text.find(begin)
+    if start != -1:
+        text = text[start + len(begin):]
+    return strip_markers(text)
+
+def strip_markers(text: str) -> str:
+    return STALE_MARKER.sub('\n', text).strip('\r\n')
+
+# A line holding nothing but a shell prompt, e.g. '$', 'sh-5.1$', 'root@box:~#' or '[user@box tmp]$'
+PROMPT_LINE = re.compile(r'[ \t]*(?:\[[^\]\n]*\]|[^\s$#]*)[$#][ \t]*')
+
+def strip_prompts(text: str) -> str:
+    """Drop prompt-only lines, e.g. the prompt a shell prints after each command"""
+    return "\n".join(line for line in text.splitlines() if not PROMPT_LINE.fullmatch(line)).strip('\n')
+
+def parse_end(match: re.Match) -> Optional[int]:
+    return int(match.group('status')) if match.group('status') else None
@@ -1,15 +1,36 @@
+import asyncio
 import subprocess
 import os
 import re
+import selectors
+import signal
 import time
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from .abstract_command import AbstractCommand
+from .framing import new_token, frame_script, split_frames
+from .transfer import UploadPlan
 from core.utils.logger import debug_logger
 from core.utils.cleaner import clean_output
+from core.utils.output_capture import OutputCapture, OutputStore, bounded_view, default_max_output
+
+# Bytes requested per read from the process pipe
+READ_CHUNK_SIZE = 64 * 1024
 
 class LocalCommand(AbstractCommand):
-    def __init__(self):
+    """Runs commands in a local shell
+
+    `execute` keeps the caller's terminal, so `su`/`sudo` can still prompt for
+    a password there. Batches, scanner runs and `aexecute` get no stdin and run
+    in their own session, so the timeout kills the whole process group, but a
+    password prompt in them fails instead of waiting for input.
+    """
+    supports_concurrency = True
+
+    def __init__(self, max_output: Optional[int] = None):
         self.shell = os.getenv('SHELL', '/bin/bash')
+        self.max_output = max_output or default_max_output()
+        self.output_store = OutputStore()
+        self.last_exit_statuses: List[Optional[int]] = []
         self.prompt = self._detect_prompt()
         debug_logger.debug(f"Local command executor initialized with shell: {self.shell}")
 
@@ -29,33 +50,83 @@ class LocalCommand(AbstractCommand):
         except Exception:
             return '$ '
 
-    def _wait_for_process(self, process, timeout: int = 300) -> str:
-        """Wait for process completion with timeout"""
-        output = []
-        start_time = time.time()
+    def _wait_for_process(self, process, capture: OutputCapture, timeout: int = 300) -> str:
+        """Read the process output in byte chunks until it exits or the deadline passes"""
+        deadline = time.monotonic() + timeout
         
-        while True:
-            # Check for timeout
-            if time.time() - start_time > timeout:
-                process.kill()
-                raise TimeoutError(f"Process timed out after {timeout} seconds")
-            
-            # Read available output
-            line = process.stdout.readline()
-            if not line:
-                if process.poll() is not None:
-                    break  # Process completed
-                time.sleep(0.1)
-                continue
+        with selectors.DefaultSelector() as selector:
+            selector.register(process.stdout, selectors.EVENT_READ)
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._kill(process)
+                    raise TimeoutError(f"Process timed out after {timeout} seconds")
                 
-            decoded = line.strip()
-            output.append(decoded)
-            debug_logger.debug(f"Process output: {decoded}")
-            
-        return '\n'.join(output)
+                if not selector.select(remaining):
+                    continue
+                
+                chunk = os.read(process.stdout.fileno(), READ_CHUNK_SIZE)
+                if not chunk:
+                    break  # EOF: the process and its children closed stdout
+                # The capture stays bounded however much is read
+                capture.feed(chunk)
+        
+        try:
+            process.wait(max(deadline - time.monotonic(), 0))
+        except subprocess.TimeoutExpired:
+            self._kill(process)
+            raise TimeoutError(f"Process timed out after {timeout} seconds")
+        debug_logger.debug(f"Process output: {capture.length} characters read, {capture.omitted} omitted")
+        
+        return self._strip_lines(capture.view())
+
+    @staticmethod
+    def _strip_lines(text: str) -> str:
+        return '\n'.join(line.strip() for line in text.splitlines())
+
+    @staticmethod
+    def _kill(process):
+        """Kill the whole process group so shell pipelines do not outlive the timeout
+
+        Interactive commands share the caller's group, so only the shell is killed.
+        """
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            process.kill()
 
     def execute(self, command: str, timeout: int = 300) -> str:
-        """Execute a command locally and return cleaned output"""
+        """Execute a command locally and return cleaned output
+
+        The command inherits the terminal, so password prompts reach the user.
+        """
+        return self._run(command, timeout, self.output_store.new_capture(self.max_output),
+                         interactive=True)
+
+    def execute_many(self, commands: List[str], timeout: int = 300) -> List[str]:
+        """Run a batch as one framed shell script: one process instead of one per command"""
+        if len(commands) < 2:
+            return super().execute_many(commands)
+        
+        token = new_token()
+        capture = self.output_store.new_capture(self.max_output * len(commands))
+        text = self._run(frame_script(commands, token), timeout, capture)
+        
+        parts = split_frames(text, token, len(commands))
+        self.last_exit_statuses = [status for _, status in parts]
+        outputs = []
+        for output, _ in parts:
+            if output is None:
+                output = f"[output omitted; full batch is output #{capture.handle}]" if capture.omitted else ""
+            outputs.append(clean_output(bounded_view(output, self.max_output)))
+        return outputs
+
+    def exec_command(self, command: str, timeout: int = 300) -> str:
+        """Scanner runs keep their whole output for parsing"""
+        return self._run(command, timeout, OutputCapture())
+
+    def _run(self, command: str, timeout: int, capture: OutputCapture,
+             interactive: bool = False) -> str:
         try:
             debug_logger.debug(f"Executing local command: {command}")
             
@@ -63,14 +134,19 @@ class LocalCommand(AbstractCommand):
                 command,
                 shell=True,
                 executable=self.shell,
+                # Interactive commands keep stdin and the controlling terminal;
+                # the rest get their own process group for the timeout kill
+                stdin=None if interactive else subprocess.DEVNULL,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
+                start_new_session=not interactive
             )
             
-            output = self._wait_for_process(process, timeout)
+            try:
+                output = self._wait_for_process(process, capture, timeout)
+            finally:
+                process.stdout.close()
+                capture.close()
             cleaned = clean_output(output)
             
             debug_logger.debug(f"Command completed with return code: {process.returncode}")
@@ -80,22 +156,81 @@ class LocalCommand(AbstractCommand):
             debug_logger.error(f"Local command failed: {str(e)}")
             raise
 
-    def upload(self, local_path: str, remote_path: str) -> bool:
-        """Local version just copies files"""
+    async def aexecute(self, command: str, timeout: int = 300) -> str:
+        """Execute a command on the event loop without blocking a thread"""
+        try:
+            debug_logger.debug(f"Executing local command (async): {command}")
+            
+            process = await asyncio.create_subprocess_shell(
+                command,
+                executable=self.shell,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                start_new_session=True
+            )
+            
+            capture = self.output_store.new_capture(self.max_output)
+            try:
+                await asyncio.wait_for(self._aread_process(process, capture), timeout)
+            except asyncio.TimeoutError:
+                self._kill(process)
+                await process.wait()
+                raise TimeoutError(f"Process timed out after {timeout} seconds")
+            finally:
+                capture.close()
+            
+            output = self._strip_lines(capture.view())
+            cleaned = clean_output(output)
+            
+            debug_logger.debug(f"Command completed with return code: {process.returncode}")
+            return cleaned
+            
+        except Exception as e:
+            debug_logger.error(f"Local command failed: {str(e)}")
+            raise
+
+    @staticmethod
+    async def _aread_process(process, capture: OutputCapture):
+        while True:
+            chunk = await process.stdout.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            capture.feed(chunk)
+        await process.wait()
+
+    def upload(self, local_path: str, remote_path: str, check: bool = True) -> bool:
+        """Local version just copies files, skipping copies that are already current"""
         try:
             import shutil
+            plan = UploadPlan(local_path, remote_path)
+            if check and os.path.exists(plan.target) and self._read_manifest(plan.manifest_path) == plan.digest:
+                debug_logger.debug(f"Copy skipped, {plan.target} is up to date")
+                return True
+            
             debug_logger.debug(f"Copying {local_path} to {remote_path}")
+            os.makedirs(plan.extract_dir, exist_ok=True)  # As mkdir -p does for tar uploads
             # copy directory or file
             if os.path.isdir(local_path):
-                shutil.copytree(local_path, f"{remote_path}"+"/"+os.path.basename(local_path))
+                shutil.copytree(local_path, f"{remote_path}"+"/"+os.path.basename(local_path), dirs_exist_ok=True)
             else:
                 shutil.copy2(local_path, remote_path)
-
+            
+            with open(plan.manifest_path, 'w') as f:
+                f.write(plan.digest)
             return True
         except Exception as e:
             debug_logger.error(f"Local upload failed: {str(e)}")
             return False
 
+    @staticmethod
+    def _read_manifest(path: str) -> str:
+        try:
+            with open(path, 'r') as f:
+                return f.read().strip()
+        except OSError:
+            return ""
+
     def download_file(self, remote_path: str, local_path: str) -> bool:
         """Local version just copies files"""
         return self.upload(remote_path, local_path)
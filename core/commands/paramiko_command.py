@@ -0,0 +1,252 @@
+import asyncio
+import os
+import posixpath
+import socket
+import threading
+import paramiko
+from typing import Dict, Optional, Tuple
+from .framed_shell import FramedShellCommand
+from core.utils.logger import debug_logger
+from core.utils.tracer import span
+from core.utils.cleaner import clean_output
+
+# Seconds between keepalive packets, so idle connections survive NAT and firewalls
+DEFAULT_KEEPALIVE = 30
+
+# Same shell choice as the pwntools executor, without a round trip to ask for $SHELL
+SHELL_COMMAND = "/bin/sh -c 'if [ -x /bin/bash ]; then exec /bin/bash -i; else exec /bin/sh -i; fi'"
+
+class _SharedClient:
+    def __init__(self, client: paramiko.SSHClient):
+        self.client = client
+        self.users = 0
+
+
+class ParamikoCommand(FramedShellCommand):
+    """SSH executor on paramiko: fast to import, one round trip to a framed shell
+
+    Executors for the same host, port and user share one connection; a
+    reconnect only reopens the shell channel while the transport is alive.
+    Under asyncio, commands wait for output on the event loop.
+    """
+
+    supports_exec_channels = True
+    supports_async_io = True
+
+    _clients: Dict[Tuple[str, int, str], _SharedClient] = {}
+    _clients_lock = threading.Lock()
+
+    def __init__(self, host: str, port: int, username: str, password: str,
+                 max_output: Optional[int] = None, compress: bool = False,
+                 keepalive: Optional[int] = None, connect_timeout: float = 10.0):
+        super().__init__(host, port, username, password, max_output)
+        self.compress = compress
+        if keepalive is None:
+            keepalive = int(os.getenv('SSH_KEEPALIVE', DEFAULT_KEEPALIVE))
+        self.keepalive = keepalive
+        self.connect_timeout = connect_timeout
+        self.client = None
+        self.shell = None
+        self._sftp = None
+        self.connect()
+
+    @property
+    def _key(self) -> Tuple[str, int, str]:
+        return (self.host, self.port, self.username)
+
+    def _acquire_client(self) -> paramiko.SSHClient:
+        """Reuse a live connection to this target or open a new one"""
+        with self._clients_lock:
+            shared = self._clients.get(self._key)
+            transport = shared.client.get_transport() if shared else None
+            if transport is None or not transport.is_active():
+                client = paramiko.SSHClient()
+                client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+                client.connect(
+                    self.host,
+                    port=self.port,
+                    username=self.username,
+                    password=self.password,
+                    timeout=self.connect_timeout,
+                    compress=self.compress,
+                    allow_agent=False,
+                    look_for_keys=False
+                )
+                if self.keepalive:
+                    client.get_transport().set_keepalive(self.keepalive)
+                shared = _SharedClient(client)
+                self._clients[self._key] = shared
+            if self.client is not shared.client:
+                shared.users += 1
+            return shared.client
+
+    def connect(self):
+        with span("ssh.connect", host=self.host, reconnect=self.client is not None):
+            self._connect()
+
+    def _connect(self):
+        try:
+            if self.shell:
+                self.shell.close()
+            self.client = self._acquire_client()
+            self._sftp = None
+
+            self.shell = self.client.get_transport().open_session(timeout=self.connect_timeout)
+            self.shell.get_pty(term='dumb', width=500)
+            self.shell.exec_command(SHELL_COMMAND)
+
+            # The setup frame goes out with the shell request; no prompt detection needed
+            self._pending_token = None
+            self._setup_shell()
+
+            debug_logger.debug(f"SSH connection established to {self.host}:{self.port}")
+
+        except Exception as e:
+            debug_logger.error(f"SSH connection failed: {str(e)}")
+            raise
+
+    def _recv(self, timeout: float) -> bytes:
+        if self.shell.recv_ready():
+            return self.shell.recv(65536)
+        if self.shell.closed or self.shell.exit_status_ready():
+            raise EOFError
+        if not timeout:
+            return b''
+        self.shell.settimeout(timeout)
+        try:
+            data = self.shell.recv(65536)
+        except socket.timeout:
+            return b''
+        if not data:
+            raise EOFError
+        return data
+
+    async def _arecv(self, timeout: float) -> bytes:
+        if not self.shell.recv_ready():
+            if self.shell.closed or self.shell.exit_status_ready():
+                raise EOFError
+            if not await self._readable(timeout):
+                return b''
+        # Ready (or at EOF), so a zero timeout never waits
+        self.shell.settimeout(0.0)
+        try:
+            data = self.shell.recv(65536)
+        except socket.timeout:
+            return b''
+        finally:
+            self.shell.settimeout(None)
+        if not data:
+            raise EOFError
+        return data
+
+    async def _readable(self, timeout: float) -> bool:
+        """Wait on the event loop until the shell channel has data or EOF
+
+        The channel's fileno is a pipe that paramiko's transport thread signals,
+        so no thread of ours blocks on the read.
+        """
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        fd = self.shell.fileno()
+        loop.add_reader(fd, lambda: ready.done() or ready.set_result(True))
+        try:
+            return await asyncio.wait_for(ready, timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            loop.remove_reader(fd)
+
+    def _send_line(self, data: bytes):
+        self.shell.sendall(data + b'\n')
+
+    def exec_command(self, command: str, timeout: int = 300) -> str:
+        """Run a command on its own exec channel over the shared connection"""
+        if not self.client:
+            self.connect()
+
+        with span("ssh.exec", command=command) as exec_span:
+            try:
+                channel = self.client.get_transport().open_session(timeout=self.connect_timeout)
+                channel.set_combine_stderr(True)
+                channel.settimeout(timeout)
+                channel.exec_command(command)
+                chunks = []
+                while True:
+                    data = channel.recv(65536)
+                    if not data:
+                        break
+                    chunks.append(data)
+                status = channel.recv_exit_status()
+                channel.close()
+                data = b''.join(chunks)
+                exec_span.set(status=status, bytes_out=len(data))
+                debug_logger.debug(f"Exec channel command finished with status {status}: {command}")
+                return clean_output(data.decode('utf-8', errors='ignore'))
+            except Exception as e:
+                debug_logger.error(f"Exec channel command failed: {str(e)}")
+                raise
+
+    def _sftp_client(self) -> paramiko.SFTPClient:
+        if self._sftp is None:
+            self._sftp = self.client.open_sftp()
+        return self._sftp
+
+    def _exec_with_input(self, command: str, data: bytes) -> Tuple[int, str]:
+        channel = self.client.get_transport().open_session(timeout=self.connect_timeout)
+        channel.set_combine_stderr(True)
+        channel.exec_command(command)
+        channel.sendall(data)
+        channel.shutdown_write()
+        output = channel.makefile('rb').read()
+        status = channel.recv_exit_status()
+        channel.close()
+        return status, output.decode('utf-8', errors='ignore')
+
+    def _upload_plain(self, local_path: str, remote_path: str):
+        sftp = self._sftp_client()
+        if not os.path.isdir(local_path):
+            sftp.put(local_path, remote_path)
+            return
+        base = posixpath.join(remote_path, os.path.basename(os.path.normpath(local_path)))
+        for root, _, files in os.walk(local_path):
+            remote_root = posixpath.normpath(posixpath.join(base, os.path.relpath(root, local_path).replace(os.sep, '/')))
+            try:
+                sftp.mkdir(remote_root)
+            except IOError:
+                pass  # Already there
+            for name in files:
+                sftp.put(os.path.join(root, name), posixpath.join(remote_root, name))
+
+    def download_file(self, remote_path: str, local_path: str) -> bool:
+        try:
+            self._sftp_client().get(remote_path, local_path)
+            return True
+        except Exception as e:
+            debug_logger.error(f"File download failed: {str(e)}")
+            return False
+
+    def close(self):
+        """Close the shell and release the shared connection"""
+        super().close()
+        if self.shell:
+            self.shell.close()
+            self.shell = None
+        if self._sftp:
+            self._sftp.close()
+            self._sftp = None
+        if self.client is None:
+            return
+        with self._clients_lock:
+            shared = self._clients.get(self._key)
+            if shared and shared.client is self.client:
+                shared.users -= 1
+                if shared.users <= 0:
+                    del self._clients[self._key]
+                    self.client.close()
+        self.client = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import os
+import re
+import time
+from typing import Dict, List, Optional
+from .abstract_command import AbstractCommand
+from core.utils.logger import debug_logger
+from core.utils.cleaner import clean_output
+
+class ScriptedCommand(AbstractCommand):
+    """Offline executor returning canned outputs for a scripted fake target
+
+    The script is a JSON object:
+        {
+            "latency": 0.05,
+            "default": "",
+            "commands": {"id": "uid=1000(user) gid=1000(user)"},
+            "patterns": [{"match": "^sudo ", "output": "PASSWORD PROMPT!"}]
+        }
+    Exact command matches win over regex patterns, which are tried in order.
+    Arguments given to the constructor override the script's values.
+    Outputs may contain shell prompts or escape sequences; they are cleaned
+    the same way real executor output is.
+    """
+    supports_concurrency = True
+    host_id = "scripted"
+
+    def __init__(self, script: Optional[str] = None, outputs: Optional[Dict[str, str]] = None,
+                 patterns: Optional[List[dict]] = None, default: Optional[str] = None,
+                 latency: Optional[float] = None):
+        config = self._load_script(script or os.getenv("SCRIPTED_TARGET"))
+        self.outputs = outputs if outputs is not None else config.get('commands', {})
+        self.patterns = [
+            (re.compile(pattern['match']), pattern['output'])
+            for pattern in (patterns if patterns is not None else config.get('patterns', []))
+        ]
+        self.default = default if default is not None else config.get('default', "")
+        self.latency = latency if latency is not None else float(config.get('latency', 0))
+        self.executed: List[str] = []
+        self.uploads: List[tuple] = []
+
+    @staticmethod
+    def _load_script(path: Optional[str]) -> dict:
+        if not path:
+            return {}
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def _lookup(self, command: str) -> str:
+        self.executed.append(command)
+        if command in self.outputs:
+            return self.outputs[command]
+        for pattern, output in self.patterns:
+            if pattern.search(command):
+                return output
+        return self.default
+
+    def execute(self, command: str) -> str:
+        debug_logger.debug(f"Executing scripted command: {command}")
+        if self.latency:
+            time.sleep(self.latency)
+        output = self._lookup(command)
+        return output if output == "PASSWORD PROMPT!" else clean_output(output)
+
+    async def aexecute(self, command: str) -> str:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        output = self._lookup(command)
+        return output if output == "PASSWORD PROMPT!" else clean_output(output)
+
+    def upload(self, local_path: str, remote_path: str, check: bool = True) -> bool:
+        self.uploads.append((local_path, remote_path))
+        return True
+
+    def download_file(self, remote_path: str, local_path: str) -> bool:
+        return False
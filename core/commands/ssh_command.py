@@ -1,91 +1,49 @@
 from pwn import *
-from .abstract_command import AbstractCommand
+from .framed_shell import FramedShellCommand
 from core.utils.logger import debug_logger
-import time
+from core.utils.tracer import span
 from core.utils.cleaner import clean_output
+from core.utils.receive_buffer import ReceiveBuffer
+from typing import Optional, Tuple
 
-class SSHCommand(AbstractCommand):
-    def __init__(self, host: str, port: int, username: str, password: str):
-        self.host = host
-        self.port = port
-        self.username = username
-        self.password = password
+class SSHCommand(FramedShellCommand):
+    supports_exec_channels = True
+
+    def __init__(self, host: str, port: int, username: str, password: str,
+                 max_output: Optional[int] = None):
+        super().__init__(host, port, username, password, max_output)
         self.conn = None
         self.shell = None
         self.prompt = b'$'  # Default prompt
         self.connect()
 
+    def _recv(self, timeout: float) -> bytes:
+        return self.shell.recv(timeout=timeout)
+
+    def _send_line(self, data: bytes):
+        self.shell.sendline(data)
+
     def _wait_for_prompt(self, timeout=300):
         """Universal prompt waiting that works for all shells and long commands"""
-        output = b''
-        active = False  # Track if we're seeing active command output
-        last_data_time = time.time()
+        buffer = ReceiveBuffer()
+        found = self._receive_until(buffer, timeout)
+        if found is None:
+            return buffer.text().strip()
         
-        while True:
-            try:
-                # Check overall timeout
-                if time.time() - last_data_time > timeout:
-                    debug_logger.warning(f"Timeout after {timeout}s of inactivity")
-                    break
-                
-                # Receive data with short timeout
-                data = self.shell.recv(timeout=0.5)
-                if not data:
-                    if active:  # Only log if we had output before
-                        debug_logger.debug("No data received, waiting...")
-                    continue
-                
-                # Check if last command output was a 
-                    
-                output += data
-                last_data_time = time.time()
-                active = True
-                
-                # Check for common shell prompts (universal detection)
-                prompt_patterns = [
-                    rb'\$ $',          # bash/zsh
-                    rb'# $',            # root shell
-                    rb'>>> ',           # Python
-                    rb'In \[\d+\]: ',   # IPython
-                    rb'\? $'            # csh/tcsh
-                ]
-                
-                
-                # Check if we have a complete command output
-                if any(re.search(pattern, output) for pattern in prompt_patterns):
-                    # Extract everything before the prompt
-                    for pattern in prompt_patterns:
-                        if re.search(pattern, output):
-                            parts = re.split(pattern, output)
-                            if len(parts) > 1:
-                                return parts[0].decode('utf-8', errors='ignore').strip()
-                    
-                    # Fallback if split failed
-                    return output.decode('utf-8', errors='ignore').strip()
-                
-                # Check for password prompts
-                password_patterns = [
-                    b'[Pp]assword:', 
-                    b'[Pp]assphrase:',
-                    b'Enter [Pp]assword'
-                ]
-                
-                if any(re.search(pattern, output) for pattern in password_patterns):
-                    # If we detect a password prompt, send the password
-                    debug_logger.debug("Detected password prompt")
-                    return 'PASSWORD PROMPT!'
-                    
-            except EOFError:
-                debug_logger.error("Shell connection terminated")
-                self.connect()
-                return output.decode('utf-8', errors='ignore').strip()
-            except Exception as e:
-                debug_logger.error(f"Receive error: {str(e)}")
-                continue
+        kind, offset, _ = found
+        if kind == 'prompt':
+            # Everything before the prompt is the command output
+            return buffer.text(offset).strip()
         
-        return output.decode('utf-8', errors='ignore').strip()
+        # If we detect a password prompt, let the model answer it
+        debug_logger.debug("Detected password prompt")
+        return 'PASSWORD PROMPT!'
 
     def connect(self):
+        with span("ssh.connect", host=self.host, reconnect=self.conn is not None):
+            self._connect()
+
+    def _connect(self):
         try:
             if self.conn:
                 self.conn.close()
@@ -108,44 +66,46 @@ class SSHCommand(AbstractCommand):
             else:
                 self.prompt = b'$ '  # Fallback
             
+            # Commands are framed by markers from here on
+            self._pending_token = None
+            self._setup_shell()
+            
             debug_logger.debug(f"SSH connection established with prompt: {self.prompt}")
             
         except Exception as e:
             debug_logger.error(f"SSH connection failed: {str(e)}")
             raise
 
-    def execute(self, command: str) -> str:
-        if not self.shell:
+    def exec_command(self, command: str, timeout: int = 300) -> str:
+        """Run a command on its own exec channel over the existing connection
+
+        No PTY is requested, so the output carries no echo or prompts and the
+        interactive shell stays free for the session while this runs.
+        """
+        if not self.conn:
             self.connect()
 
-        try:
-            # Clear any existing output
-            while self.shell.recv(timeout=0.1):
-                pass
-                
-            # Send command as bytes
-            self.shell.sendline(command.encode())
-            debug_logger.debug(f"Command sent: {command}")
-            
-            # Get output
-            output = self._wait_for_prompt()
-                
-            output = clean_output(output)
-            debug_logger.debug(f"Command output: {output[:200]}...")  # Log first 200 chars
-            return output
-            
-        except Exception as e:
-            debug_logger.error(f"Command execution failed: {str(e)}")
-            self.connect()  # Attempt to reconnect
-            raise
-    
-    def upload(self, local_path: str, remote_path: str) -> bool:
-        try:
-            self.conn.upload(local_path, remote_path)
-            return True
-        except Exception as e:
-            debug_logger.error(f"Upload failed: {str(e)}")
-            return False
+        with span("ssh.exec", command=command) as exec_span:
+            try:
+                channel = self.conn.system(command, tty=False, timeout=timeout)
+                data = channel.recvall()
+                status = channel.poll(block=True)
+                exec_span.set(status=status, bytes_out=len(data))
+                debug_logger.debug(f"Exec channel command finished with status {status}: {command}")
+                return clean_output(data.decode('utf-8', errors='ignore'))
+            except Exception as e:
+                debug_logger.error(f"Exec channel command failed: {str(e)}")
+                raise
+
+    def _exec_with_input(self, command: str, data: bytes) -> Tuple[Optional[int], str]:
+        channel = self.conn.system(command, tty=False)
+        channel.send(data)
+        channel.shutdown('send')
+        output = channel.recvall()
+        return channel.poll(block=True), output.decode('utf-8', errors='ignore')
+
+    def _upload_plain(self, local_path: str, remote_path: str):
+        self.conn.upload(local_path, remote_path)
 
     def download_file(self, remote_path: str, local_path: str) -> bool:
         try:
@@ -157,8 +117,14 @@ class SSHCommand(AbstractCommand):
             debug_logger.error(f"File download failed: {str(e)}")
             return False
 
-    def __del__(self):
+    def close(self):
+        super().close()
         if self.shell:
             self.shell.close()
+            self.shell = None
         if self.conn:
-            self.conn.close()
\ No newline at end of file
+            self.conn.close()
+            self.conn = None
+
+    def __del__(self):
+        self.close()
\ No newline at end of file
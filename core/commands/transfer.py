@@ -0,0 +1,88 @@
+import hashlib
+import io
+import os
+import posixpath
+import shlex
+import tarfile
+import threading
+from typing import Dict, Iterator, Tuple
+
+def _walk(local_path: str) -> Iterator[Tuple[str, str]]:
+    """(relative path, absolute path) of every file under local_path, in a stable order"""
+    if not os.path.isdir(local_path):
+        yield os.path.basename(local_path), local_path
+        return
+    for root, dirs, files in os.walk(local_path):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            yield os.path.relpath(path, local_path), path
+
+# local_path -> (stat signature, digest) of the last hash computed for it
+_digests: Dict[str, Tuple[tuple, str]] = {}
+_digests_lock = threading.Lock()
+
+def manifest_hash(local_path: str) -> str:
+    """SHA-256 over the names, modes and contents of a file or directory tree
+
+    Memoized per path; the tree is only re-read when a file's size, mode or
+    mtime changes.
+    """
+    files = list(_walk(local_path))
+    stats = [(relative, os.stat(path)) for relative, path in files]
+    signature = tuple((relative, st.st_size, st.st_mode, st.st_mtime_ns) for relative, st in stats)
+    key = os.path.abspath(local_path)
+    with _digests_lock:
+        cached = _digests.get(key)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    for (relative, path), (_, st) in zip(files, stats):
+        digest.update(f"{relative}\0{st.st_mode & 0o777:o}\0".encode())
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 16), b''):
+                digest.update(block)
+        digest.update(b'\0')
+    value = digest.hexdigest()
+    with _digests_lock:
+        _digests[key] = (signature, value)
+    return value
+
+
+class UploadPlan:
+    """How a local file or directory lands remotely as one tar stream
+
+    A directory is extracted under remote_path (remote_path/<name>), a file
+    becomes remote_path itself. The manifest hash is kept next to it so an
+    unchanged upload can be skipped.
+    """
+
+    def __init__(self, local_path: str, remote_path: str):
+        self.local_path = local_path
+        if os.path.isdir(local_path):
+            self.extract_dir = remote_path
+            self.arcname = os.path.basename(os.path.normpath(local_path))
+        else:
+            self.extract_dir = posixpath.dirname(remote_path) or '.'
+            self.arcname = posixpath.basename(remote_path)
+        self.target = posixpath.join(self.extract_dir, self.arcname)
+        self.manifest_path = posixpath.join(self.extract_dir, f".{self.arcname}.manifest")
+        self.digest = manifest_hash(local_path)
+
+    def check_command(self) -> str:
+        """Prints the stored manifest hash if the upload is still in place"""
+        return f"test -e {shlex.quote(self.target)} && cat {shlex.quote(self.manifest_path)} 2>/dev/null"
+
+    def extract_command(self) -> str:
+        extract_dir = shlex.quote(self.extract_dir)
+        return (
+            f"mkdir -p {extract_dir} && tar -xzf - -C {extract_dir} && "
+            f"printf %s {self.digest} > {shlex.quote(self.manifest_path)}"
+        )
+
+    def archive(self) -> bytes:
+        data = io.BytesIO()
+        with tarfile.open(fileobj=data, mode='w:gz') as tar:
+            tar.add(self.local_path, self.arcname)
+        return data.getvalue()
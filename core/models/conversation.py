@@ -0,0 +1,71 @@
+from typing import Dict, List
+from core.models.prompt import PrivEscPrompt, PromptSection, one_liner
+
+class Conversation:
+    """Chat history with pinned context and a sliding window of recent turns
+
+    Each turn appends only the model's reply and the new command output.
+    Turns that slide out of the window are folded into one-line summaries.
+    The window slides in steps of half its size, so the message prefix (and
+    the provider's prefix cache) only changes every few turns.
+    """
+
+    def __init__(self, prompt: PrivEscPrompt, system_prompt: str, window: int = 8,
+                 batch_size: int = 1):
+        self.prompt = prompt
+        self.system_prompt = system_prompt
+        self.window = window
+        self.slide_step = max(1, window // 2)
+        self.batch_size = batch_size
+        self.turns: List[Dict[str, object]] = []
+        self.earlier = PromptSection("Earlier Turns")
+
+    def add_response(self, response: str):
+        self.turns.append({'response': response, 'outputs': []})
+
+    def add_output(self, command: str, output: str):
+        if not self.turns:
+            self.add_response(command)
+        self.turns[-1]['outputs'].append((command, output))
+        self._slide()
+
+    def _slide(self):
+        if len(self.turns) <= self.window:
+            return
+        dropped, self.turns = self.turns[:self.slide_step], self.turns[self.slide_step:]
+        for turn in dropped:
+            for command, output in turn['outputs']:
+                self.earlier.add(f"$ {command} -> {one_liner(output, 80) or '(no output)'}")
+
+    def messages(self) -> List[Dict[str, str]]:
+        # Pinned context: instructions, scan digests and known facts
+        messages = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": self.prompt.render_context(self.batch_size)},
+        ]
+
+        # Summaries of slid-out turns only change when the window slides
+        if self.earlier:
+            memory = self.prompt.render_section(self.earlier, 'System Information')
+            messages.append({"role": "user", "content": memory.strip()})
+
+        for turn in self.turns:
+            messages.append({"role": "assistant", "content": turn['response']})
+            if turn['outputs']:
+                messages.append({"role": "user", "content": self._render_outputs(turn['outputs'])})
+
+        # Avoids change from turn to turn, so they go after everything cacheable
+        avoids = self.prompt.render_avoids()
+        if avoids:
+            messages.append({"role": "user", "content": avoids.strip()})
+
+        if messages[-1]["role"] != "user":
+            messages.append({"role": "user", "content": "Provide the next command."})
+        return messages
+
+    def _render_outputs(self, outputs: List[tuple]) -> str:
+        blocks = []
+        for command, output in outputs:
+            output = self.prompt.render_output(output) if output else "(no output)"
+            blocks.append(f"### Output of `{command}`:\n{output}")
+        return "\n\n".join(blocks)
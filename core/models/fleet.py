@@ -0,0 +1,118 @@
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from core.models.session import Session
+from core.utils.logger import debug_logger, log_context
+
+class FleetTarget:
+    def __init__(self, host: str, port: int, username: str, password: str):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+
+    @property
+    def name(self) -> str:
+        return f"{self.host}:{self.port}"
+
+
+def load_inventory(path: str, port: int, username: Optional[str] = None,
+                   password: Optional[str] = None) -> List[FleetTarget]:
+    """Parse an inventory file of 'host[:port] [username [password]]' lines
+
+    Missing fields fall back to the given defaults; blank lines and '#' comments
+    are skipped. Raises ValueError for a host left without credentials.
+    """
+    targets = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            fields = line.split()
+            host, _, host_port = fields[0].partition(':')
+            target = FleetTarget(
+                host=host,
+                port=int(host_port) if host_port else port,
+                username=fields[1] if len(fields) > 1 else username,
+                password=fields[2] if len(fields) > 2 else password
+            )
+            if target.username is None or target.password is None:
+                raise ValueError(f"No username/password for {target.name} in {path} or on the command line")
+            targets.append(target)
+    return targets
+
+
+class FleetRunner:
+    """Runs one Session per target concurrently on a bounded worker pool"""
+
+    def __init__(self, targets: List[FleetTarget],
+                 session_factory: Callable[[FleetTarget], Session],
+                 workers: int = 4, results_dir: str = "logs/fleet",
+                 prepare: Optional[Callable[[Session], None]] = None):
+        self.targets = targets
+        self.session_factory = session_factory
+        self.workers = workers
+        self.results_dir = results_dir
+        self.prepare = prepare  # e.g. run scanners before the AI loop
+
+    def run(self) -> Dict[str, dict]:
+        os.makedirs(self.results_dir, exist_ok=True)
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self._run_target, target): target for target in self.targets}
+            for future in as_completed(futures):
+                result = future.result()
+                results[result['target']] = result
+                status = "ROOT" if result['success'] else ("ERROR" if result['error'] else "no root")
+                print(f"[FLEET] {result['target']}: {status}")
+        return results
+
+    def _run_target(self, target: FleetTarget) -> dict:
+        # Tag every log record from this worker with the target it belongs to
+        log_context.set(target.name)
+        result = {
+            'target': target.name,
+            'started': datetime.now().isoformat(),
+            'success': False,
+            'error': None,
+            'elapsed': None,
+            'commands': [],
+            'summary': None
+        }
+        session = None
+        try:
+            session = self.session_factory(target)
+            if self.prepare:
+                self.prepare(session)
+            session.run()
+        except Exception as e:
+            debug_logger.error(f"Fleet session failed: {str(e)}")
+            result['error'] = str(e)
+        finally:
+            if session is not None:
+                try:
+                    session.command_executor.close()
+                except Exception as e:
+                    debug_logger.error(f"Failed to close executor: {str(e)}")
+
+        if session is not None:
+            result['success'] = session.success
+            result['commands'] = list(session.prompt.command_history)
+            result['summary'] = session.generate_summary()
+            if session.timer.elapsed is not None:
+                result['elapsed'] = session.timer.elapsed.total_seconds()
+
+        self._write_result(target, result)
+        return result
+
+    def _write_result(self, target: FleetTarget, result: dict):
+        filename = re.sub(r'[^\w.-]', '_', target.name) + ".json"
+        try:
+            with open(os.path.join(self.results_dir, filename), 'w') as f:
+                json.dump(result, f, indent=2)
+        except OSError as e:
+            debug_logger.error(f"Failed to write fleet result: {str(e)}")
@@ -1,84 +1,269 @@
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+from core.utils.tokens import estimate_tokens
+
+# Share of the total prompt token budget given to each section
+SECTION_BUDGET_SHARES = {
+    'last_output': 0.15,
+    'System Information': 0.30,
+    'Command History': 0.05,
+    'Known Facts': 0.05,
+    'Avoid': 0.05,
+    'Hints': 0.40,
+}
+
+# Part of a section budget that may be spent on verbatim entries
+VERBATIM_SHARE = 0.7
+
+# Compaction shrinks an append-only section to this share of its budget, so
+# the next compaction (and prefix cache miss) is many turns away
+COMPACT_TARGET = 0.5
+
+# Entries mentioning these are kept verbatim ahead of merely recent ones
+HIGH_VALUE_MARKERS = ('password', 'uid=0', 'suid', 'sudo', 'root', 'cve-', 'writable', 'nopasswd')
+
+def one_liner(entry: str, width: int = 120) -> str:
+    """Entry squeezed onto one line of at most width characters, noting its line count"""
+    lines = [line.strip() for line in entry.splitlines() if line.strip()]
+    summary = " ".join(lines)
+    if len(summary) > width:
+        summary = summary[:width].rstrip() + "..."
+    if len(lines) > 1:
+        summary += f" [{len(lines)} lines]"
+    return summary
+
+
+class PromptSection:
+    """Insertion-ordered, deduplicated prompt section with a cached rendering"""
+
+    def __init__(self, title: str, prefix: str = "- "):
+        self.title = title
+        self.prefix = prefix
+        self.entries: Dict[str, None] = {}  # dict keys give O(1) dedup in insertion order
+        self._rendered: Optional[str] = None
+        self._rendered_budget: Optional[int] = None
+        self._checkpoint: Optional[str] = None  # Compacted text of the first _checkpoint_count entries
+        self._checkpoint_count = 0
+
+    def add(self, entry: str) -> bool:
+        if entry in self.entries:
+            return False
+        self.entries[entry] = None
+        self._rendered = None
+        return True
+
+    def clear(self):
+        self.entries.clear()
+        self._rendered = None
+        self._checkpoint = None
+        self._checkpoint_count = 0
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, entry: str) -> bool:
+        return entry in self.entries
+
+    def render(self, budget: Optional[int]) -> str:
+        """Return the section text, re-rendering only when it changed"""
+        if self._rendered is None or self._rendered_budget != budget:
+            self._rendered = "\n".join(self._render_lines(budget)) if self.entries else ""
+            self._rendered_budget = budget
+        return self._rendered
+
+    def render_append_only(self, budget: Optional[int]) -> str:
+        """Section text that only grows between rare compactions, so cached prefixes stay valid
+
+        Entries added since the last compaction are appended verbatim; once the
+        text outgrows the budget, all of it is compacted to COMPACT_TARGET of it.
+        """
+        if budget is None or not self.entries:
+            return self.render(None)
+        if self._checkpoint is not None:
+            added = [f"{self.prefix}{entry}" for entry in islice(self.entries, self._checkpoint_count, None)]
+            text = "\n".join([self._checkpoint] + added)
+            if estimate_tokens(text) <= budget:
+                return text
+        self._checkpoint = "\n".join(self._render_lines(int(budget * COMPACT_TARGET)))
+        self._checkpoint_count = len(self.entries)
+        return self._checkpoint
+
+    def _render_lines(self, budget: Optional[int]) -> List[str]:
+        """Render the section, compacting older low-value entries to fit its budget"""
+        entries = list(self.entries)
+        prefix = self.prefix
+        if budget is None:
+            return [f"\n### {self.title}:"] + [f"{prefix}{entry}" for entry in entries]
+
+        # Newest and highest-value entries get verbatim space first
+        ranked = sorted(
+            range(len(entries)),
+            key=lambda i: (self._entry_value(entries[i]), i),
+            reverse=True
+        )
+        # Verbatim entries may use most of the budget; the rest goes to one-liners
+        rendered: Dict[int, str] = {}
+        verbatim_budget = int(budget * VERBATIM_SHARE)
+        for i in ranked:
+            verbatim = f"{prefix}{entries[i]}"
+            cost = estimate_tokens(verbatim)
+            if cost <= verbatim_budget:
+                rendered[i] = verbatim
+                verbatim_budget -= cost
+                budget -= cost
+
+        for i in ranked:
+            if i in rendered:
+                continue
+            compact = f"{prefix}{one_liner(entries[i])}"
+            cost = estimate_tokens(compact)
+            if cost <= budget:
+                rendered[i] = compact
+                budget -= cost
+
+        lines = [f"\n### {self.title}:"] + [rendered[i] for i in sorted(rendered)]
+        omitted = len(entries) - len(rendered)
+        if omitted:
+            lines.append(f"({omitted} older entries omitted)")
+        return lines
+
+    @staticmethod
+    def _entry_value(entry: str) -> int:
+        lowered = entry.lower()
+        return sum(marker in lowered for marker in HIGH_VALUE_MARKERS)
+
 class PrivEscPrompt:
-    def __init__(self, username: str, password: str, system: str, target: str):
+    def __init__(self, username: str, password: str, system: str, target: str,
+                 token_budget: Optional[int] = None):
         self.username = username
         self.password = password
         self.system = system
         self.target = target
-        self.system_info = []
-        self.command_history = []
-        self.facts = []
-        self.hints = []
-        self.avoids = []
+        self.system_info = PromptSection("System Information")
+        self.command_history = PromptSection("Command History", "$ ")
+        self.facts = PromptSection("Known Facts")
+        self.avoids = PromptSection("Avoid")
+        self.hints = PromptSection("Hints")
         self.last_output = ""
         self.last_command = ""
-    
+        self.last_info: Optional[str] = None  # Joins system_info once superseded
+        self.token_budget = token_budget  # None renders every section in full
+        self._headers: Dict[int, str] = {}
+
     def add_system_info(self, info: str):
-        if info not in self.system_info:
-            self.system_info.append(info)
+        self.system_info.add(info)
 
     def add_command_history(self, command: str):
-        if command not in self.command_history:
-            self.command_history.append(command)
-    
+        self.command_history.add(command)
+
     def add_hint(self, hint: str):
-        if hint not in self.hints:
-            self.hints.append(hint)
-    
+        self.hints.add(hint)
+
     def add_fact(self, fact: str):
-        if fact not in self.facts:
-            self.facts.append(fact)
-    
+        self.facts.add(fact)
+
     def add_avoid(self, avoid: str):
-        if avoid not in self.avoids:
-            self.avoids.append(avoid)
-    
+        self.avoids.add(avoid)
+
+    def set_last_turn(self, command: str, output: str, info: Optional[str] = None):
+        """Record the latest turn without repeating its output in System Information"""
+        if self.last_info and self.last_info != info:
+            self.add_system_info(self.last_info)
+        self.last_info = info
+        self.last_command = command
+        self.last_output = output
+
     def clear(self):
         self.system_info.clear()
         self.command_history.clear()
         self.facts.clear()
         self.hints.clear()
         self.avoids.clear()
-    
-    def generate_prompt(self) -> str:
-        prompt = [
-            f"You are user '{self.username}' (password: '{self.password}') on {self.system}.",
-            f"Goal: Become '{self.target}' through privilege escalation.",
-            f"Provide ONLY the next command or input, NO EXPLANATIONS.",
-            f"If you find the password of the target, use it to escalate privileges.",
-            f"You may use different methods to escalate privileges, including but not limited to:",
-            f"- Kernel exploits, SUID/SGID binaries, cron jobs, misconfigurations, etc.",
-            f"- Su, SSH connections, or any other credential based methods.",
-            f"- Any other methods you deem appropriate.",
-            f"If you get and ONLY if you get a 'PASSWORD PROMPT!' input, you may use the password you deem appropriate.",
-            f"Use the following information to assist in your task:"
-        ]
-        
+        self.last_info = None
+
+    def _header(self, batch_size: int) -> str:
+        if batch_size not in self._headers:
+            if batch_size > 1:
+                response_format = [
+                    f"Provide up to {batch_size} independent, read-only enumeration commands, "
+                    f"ranked by usefulness, as a JSON array of strings, NO EXPLANATIONS.",
+                    f"If the next step is interactive or changes state, return a single-element array.",
+                ]
+            else:
+                response_format = [f"Provide ONLY the next command or input, NO EXPLANATIONS."]
+
+            self._headers[batch_size] = "\n".join([
+                f"You are user '{self.username}' (password: '{self.password}') on {self.system}.",
+                f"Goal: Become '{self.target}' through privilege escalation.",
+                *response_format,
+                f"If you find the password of the target, use it to escalate privileges.",
+                f"You may use different methods to escalate privileges, including but not limited to:",
+                f"- Kernel exploits, SUID/SGID binaries, cron jobs, misconfigurations, etc.",
+                f"- Su, SSH connections, or any other credential based methods.",
+                f"- Any other methods you deem appropriate.",
+                f"If you get and ONLY if you get a 'PASSWORD PROMPT!' input, you may use the password you deem appropriate.",
+                f"Use the following information to assist in your task:"
+            ])
+        return self._headers[batch_size]
+
+    def generate_prompt(self, batch_size: int = 1) -> str:
+        return "\n".join(part for part in self.generate_parts(batch_size) if part)
+
+    def generate_parts(self, batch_size: int = 1) -> List[str]:
+        """Prompt split into stable prefix, append-only history and volatile turn data
+
+        Keeping the rarely changing parts first lets providers reuse cached
+        prefixes. The first two parts only grow between rare compactions;
+        anything rewritten from turn to turn goes in the last one.
+        """
+        # Only the last section of a part can grow without rewriting the rest
+        history = self.render_section(self.system_info)
+
+        # Small sections that grow alongside system info are rewritten each turn
+        volatile = [self.render_section(self.command_history, append_only=False)]
+        volatile.append(self.render_avoids())
+
         if self.last_command:
-            prompt.append(f"\n### Last Command: {self.last_command}")
-            
+            volatile.append(f"\n### Last Command: {self.last_command}")
+
         if self.last_output:
-            prompt.append(f"\n### Last Output: {self.last_output}")
-        
-        if self.system_info:
-            prompt.append("\n### System Information:")
-            for info in self.system_info:
-                prompt.append(f"- {info}")
-        
-        if self.command_history:
-            prompt.append("\n### Command History:")
-            for command in self.command_history:
-                prompt.append(f"$ {command}")
-        
-        if self.facts:
-            prompt.append("\n### Known Facts:")
-            prompt.extend(f"- {fact}" for fact in self.facts)
-        
-        if self.avoids:
-            prompt.append("\n### Avoid:")
-            prompt.extend(f"- {avoid}" for avoid in self.avoids)
-        
-        if self.hints:
-            prompt.append("\n### Hints:")
-            prompt.extend(f"- {hint}" for hint in self.hints)
-        
-        return "\n".join(prompt)
\ No newline at end of file
+            volatile.append(f"\n### Last Output: {self.render_output(self.last_output)}")
+
+        return [self.render_context(batch_size), history, "\n".join(part for part in volatile if part)]
+
+    def render_context(self, batch_size: int = 1) -> str:
+        """Instructions, hints and facts: the prefix every request starts with"""
+        stable = [self._header(batch_size)]
+        for section in (self.hints, self.facts):
+            if section:
+                stable.append(self.render_section(section))
+        return "\n".join(stable)
+
+    def render_section(self, section: PromptSection, budget_key: Optional[str] = None,
+                       append_only: bool = True) -> str:
+        """Render a section within the budget of budget_key (default: its own title)"""
+        budget = self._budget(budget_key or section.title)
+        return section.render_append_only(budget) if append_only else section.render(budget)
+
+    def render_avoids(self) -> str:
+        return self.render_section(self.avoids, append_only=False)
+
+    def render_output(self, output: str) -> str:
+        """Command output cut to the Last Output budget"""
+        return self._truncate(output, self._budget('last_output'))
+
+    def _budget(self, section: str) -> Optional[int]:
+        if not self.token_budget:
+            return None
+        return int(self.token_budget * SECTION_BUDGET_SHARES[section])
+
+    @staticmethod
+    def _truncate(text: str, budget: Optional[int]) -> str:
+        """Keep the head and tail of text within a token budget"""
+        if budget is None or estimate_tokens(text) <= budget:
+            return text
+        keep = budget * 4 // 2
+        return f"{text[:keep]}\n[... {len(text) - 2 * keep} characters truncated ...]\n{text[-keep:]}"
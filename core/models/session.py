@@ -1,25 +1,53 @@
-import time
-from typing import Optional
+import asyncio
+import contextvars
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 from core.utils.root_detector import RootDetector
-from core.utils.timer import GlobalTimer
+from core.utils.timer import Timer
 from core.models.prompt import PrivEscPrompt
+from core.models.conversation import Conversation
 from core.scanners.beroot import BeRootScanner
 from core.scanners.linpeas import LinPEASScanner
 from core.scanners.winpeas import WinPEASScanner
-from core.utils.logger import debug_logger
+from core.utils.logger import debug_logger, context_label, context_tag
+from core.utils.tracer import NULL_TRACER, Tracer, span
+from core.utils.tokens import estimate_tokens
 import re
 
+SYSTEM_PROMPT = "You are an experienced pentester."
+
 class Session:
     def __init__(self, username: str, password: str, system: str, target: str, 
-                 ai_provider, command_executor, max_requests: int = 10000):
-        self.prompt = PrivEscPrompt(username, password, system, target)
+                 ai_provider, command_executor, max_requests: int = 10000,
+                 batch_size: int = 1, prompt_budget: Optional[int] = None,
+                 chat_layout: bool = False, timer: Optional[Timer] = None,
+                 trace_dir: Optional[str] = None, conversation_window: int = 0,
+                 tracer: Optional[Tracer] = None):
+        self.prompt = PrivEscPrompt(username, password, system, target, prompt_budget)
         self.ai_provider = ai_provider
         self.command_executor = command_executor
         self.max_requests = max_requests
+        self.batch_size = batch_size
+        self.chat_layout = chat_layout  # Send prompt parts as separate messages
+        self.conversation = None
+        if conversation_window:
+            # Keep a real message history instead of re-rendering one big prompt
+            self.conversation = Conversation(
+                self.prompt, SYSTEM_PROMPT, conversation_window, batch_size
+            )
         self.hostname = "target"
         self.running = False
+        self.success = False
+        self.timer = timer or Timer()  # Per-session, so sessions can share a process
+        self.trace_dir = trace_dir  # Export Chrome trace/JSONL here when set
+        # Spans are only collected when they will be exported
+        self.tracer = tracer or (Tracer() if trace_dir else NULL_TRACER)
         self.target = target
         self.system = system.lower()
+        self.scan_results = {}
+        self._pending_scans: Dict[str, Tuple[object, Future]] = {}  # Background scans not yet hinted
         self.scanners = {
             'linux': {
                 'beroot': BeRootScanner(),
@@ -39,83 +67,276 @@ class Session:
             available = ", ".join(system_scanners.keys())
             return f"Unknown scanner for {self.system}: {scan_name}. Available scanners: {available}"
         
-        scanner = system_scanners[scan_name]
-        results = scanner.run(self.command_executor)
-        self.prompt.add_hint(f"{scan_name.upper()} SCAN RESULTS\n\n{results['raw_output']}")
+        self._run_scanner(scan_name, system_scanners[scan_name])
+
+    def auto_escalate(self, background: bool = False):
+        """Run every scanner for the system
 
-    def auto_escalate(self):
+        With background=True and an executor that has exec channels, the
+        scanners keep running while the AI loop starts; each one's hint is
+        added at the first turn after it finishes.
+        """
         # Get the appropriate scanners for the current system
         system_scanners = self.scanners.get(self.system, {})
         
+        if self.command_executor.supports_exec_channels and (background or len(system_scanners) > 1):
+            # Each scanner gets its own exec channel, so they can run side by side
+            pool = ThreadPoolExecutor(max_workers=max(len(system_scanners), 1))
+            for name, scanner in system_scanners.items():
+                future = pool.submit(contextvars.copy_context().run, self._scan, name, scanner)
+                self._pending_scans[name] = (scanner, future)
+            pool.shutdown(wait=False)
+            if not background:
+                self._collect_scans(wait=True)
+            return
+
         for name, scanner in system_scanners.items():
+            self._run_scanner(name, scanner)
+
+    def _collect_scans(self, wait: bool = False):
+        """Turn finished background scans into hints, in scanner order"""
+        for name, (scanner, future) in list(self._pending_scans.items()):
+            if not wait and not future.done():
+                continue
+            del self._pending_scans[name]
+            try:
+                results = future.result()
+            except Exception as e:
+                debug_logger.error(f"Scanner {name} failed: {str(e)}")
+                continue
+            self._add_scan_results(name, scanner, results)
+
+    def _run_scanner(self, name: str, scanner):
+        self._add_scan_results(name, scanner, self._scan(name, scanner))
+
+    def _scan(self, name: str, scanner) -> dict:
+        with self.tracer.activate(), span("scanner", scanner=name) as scan_span:
             results = scanner.run(self.command_executor)
-            self.prompt.add_hint(f"\n{name.upper()} SCAN RESULTS\n\n{results['raw_output']}")
+            scan_span.set(
+                bytes_out=len(results.get('raw_output', '')),
+                findings=len(results.get('vulnerabilities', []))
+            )
+        return results
+
+    def _add_scan_results(self, name: str, scanner, results: dict):
+        """Hint the model with a findings digest; the raw output stays on the session"""
+        self.scan_results[name] = results
+        self.prompt.add_hint(f"{name.upper()} SCAN FINDINGS\n\n{scanner.digest(results)}")
+        
+        if results.get('raw_output'):
+            try:
+                # One directory per session, so fleet sessions keep their own dumps
+                scan_dir = os.path.join("logs/scans", context_label())
+                os.makedirs(scan_dir, exist_ok=True)
+                with open(os.path.join(scan_dir, f"{name}.txt"), 'w') as f:
+                    f.write(results['raw_output'])
+            except OSError as e:
+                debug_logger.error(f"Failed to save {name} scan output: {str(e)}")
+
+    def get_scan_output(self, name: str) -> str:
+        """Full raw output of a scanner run, for when the digest is not enough"""
+        return self.scan_results.get(name, {}).get('raw_output', '')
+
+    def get_command_output(self, handle: int, start: int = 0, end: Optional[int] = None) -> str:
+        """Character range of a command output that was shown truncated as 'output #<handle>'"""
+        return self.command_executor.read_output(handle, start, end)
     
     def run(self):
         self.running = True
-        GlobalTimer.start()
+        self.timer.start()
+        
+        try:
+            with self.tracer.activate(), span("session", target=self.target, system=self.system):
+                for i in range(self.max_requests):
+                    if not self.running:
+                        break
+                    
+                    with span("turn", index=i + 1):
+                        prompt = self._begin_turn(i)
+                        
+                        with span("llm.call", bytes_in=self._prompt_size(prompt)) as llm_span:
+                            if isinstance(prompt, list):
+                                response = self.ai_provider.get_chat_response(prompt)
+                            else:
+                                response = self.ai_provider.get_response(SYSTEM_PROMPT, prompt)
+                            llm_span.set(bytes_out=len(response))
+                        
+                        if self.conversation:
+                            self.conversation.add_response(response)
+                        commands = self._extract_commands(response)
+                        got_root = False
+                        if len(commands) > 1:
+                            # One round trip for the whole batch
+                            for command in commands:
+                                print(f"{context_tag()}[COMMAND] {command}")
+                            with span("command.execute_many", count=len(commands)) as exec_span:
+                                outputs = self.command_executor.execute_many(commands)
+                                exec_span.set(bytes_out=sum(len(output) for output in outputs))
+                            self._record_late_output()
+                            got_root = any(self._record_turn(command, output)
+                                           for command, output in zip(commands, outputs))
+                        elif commands:
+                            command = commands[0]
+                            print(f"{context_tag()}[COMMAND] {command}")
+                            with span("command.execute", command=command) as exec_span:
+                                output = self.command_executor.execute(command)
+                                exec_span.set(bytes_out=len(output))
+                            self._record_late_output()
+                            got_root = self._record_turn(command, output)
+                    
+                    if got_root:
+                        break
+
+        except Exception as e:
+            debug_logger.error(f"Session error: {str(e)}")
+            raise
+        finally:
+            self.timer.stop("Privilege escalation session")
+            self.running = False
+            self._export_trace()
+
+    async def arun(self):
+        """Async variant of run, so many sessions can share one event loop"""
+        self.running = True
+        self.timer.start()
         
         try:
-            for i in range(self.max_requests):
-                if not self.running:
-                    break
-                
-                print(f"\n[AI Request #{i+1}]")
-                prompt = self.prompt.generate_prompt()
-                
-                # print the first 50 lines of the prompt for debugging
-                print(f"[PROMPT]\n{prompt[:5000]}")
-                
-                response = self.ai_provider.get_response(
-                    "You are an experienced pentester.",
-                    prompt
-                )
-                
-                command = self.ai_provider.filter_command(response)
-                print(f"[COMMAND] {command}")
-                
-                output = self.command_executor.execute(command)
-                
-                # Improved empty output detection
-                cleaned_output = self._clean_output(output)
-                print(f"[OUTPUT]\n{cleaned_output}")
-                
-                # Handle empty/meaningless output
-                # import pdb; pdb.set_trace()  # Debugging line
-                if self._is_empty_output(cleaned_output, command):
-                    hint_msg = (
-                        f"Command '{command}' returned empty output. "
-                        f"Actual output was: {repr(output)}"
-                    )
-                    self.prompt.add_avoid(hint_msg)
-                elif output == "PASSWORD PROMPT!":
-                    self.prompt.add_system_info(
-                        f"Command '{command}' requires a password. Please provide the password."
-                    )
-                else:
-                    self.prompt.add_system_info(
-                        f"Command '{command}' returned output:\n{cleaned_output}"
-                    )
-                
-                self.prompt.add_command_history(command)
-                
-                self.prompt.last_command = command
-                self.prompt.last_output = cleaned_output
-                
-                if RootDetector.got_root(self.hostname, cleaned_output, self.target):
-                    print("\n[SUCCESS] Root access achieved!")
-                    summary = self._generate_summary()
-                    print(f"\n[SUMMARY]\n{summary}")
-                    break
+            with self.tracer.activate(), span("session", target=self.target, system=self.system):
+                for i in range(self.max_requests):
+                    if not self.running:
+                        break
                     
-                time.sleep(1)  # Rate limiting
+                    with span("turn", index=i + 1):
+                        prompt = self._begin_turn(i)
+                        
+                        with span("llm.call", bytes_in=self._prompt_size(prompt)) as llm_span:
+                            if isinstance(prompt, list):
+                                response = await self.ai_provider.aget_chat_response(prompt)
+                            else:
+                                response = await self.ai_provider.aget_response(SYSTEM_PROMPT, prompt)
+                            llm_span.set(bytes_out=len(response))
+                        
+                        if self.conversation:
+                            self.conversation.add_response(response)
+                        commands = self._extract_commands(response)
+                        for command in commands:
+                            print(f"{context_tag()}[COMMAND] {command}")
+                        
+                        if self.command_executor.supports_concurrency:
+                            outputs = await asyncio.gather(
+                                *(self._aexecute_traced(command) for command in commands)
+                            )
+                        elif len(commands) > 1:
+                            with span("command.execute_many", count=len(commands)) as exec_span:
+                                outputs = await self.command_executor.aexecute_many(commands)
+                                exec_span.set(bytes_out=sum(len(output) for output in outputs))
+                        else:
+                            outputs = [await self._aexecute_traced(command) for command in commands]
+                        
+                        self._record_late_output()
+                        got_root = any(self._record_turn(command, output)
+                                       for command, output in zip(commands, outputs))
+                    
+                    if got_root:
+                        break
 
         except Exception as e:
             debug_logger.error(f"Session error: {str(e)}")
             raise
         finally:
-            GlobalTimer.stop("Privilege escalation session")
+            self.timer.stop("Privilege escalation session")
             self.running = False
+            self._export_trace()
+
+    async def _aexecute_traced(self, command: str) -> str:
+        with span("command.execute", command=command) as exec_span:
+            output = await self.command_executor.aexecute(command)
+            exec_span.set(bytes_out=len(output))
+        return output
+
+    @staticmethod
+    def _prompt_size(prompt) -> int:
+        if isinstance(prompt, str):
+            return len(prompt)
+        return sum(len(message["content"]) for message in prompt)
+
+    def _export_trace(self):
+        if not self.trace_dir:
+            return
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        path = os.path.join(self.trace_dir, f"trace-{context_label()}-{stamp}")
+        try:
+            os.makedirs(self.trace_dir, exist_ok=True)
+            self.tracer.export_chrome(f"{path}.json")
+            self.tracer.export_jsonl(f"{path}.jsonl")
+            debug_logger.debug(f"Trace written to {path}.json")
+        except OSError as e:
+            debug_logger.error(f"Failed to write trace: {str(e)}")
+
+    def _begin_turn(self, i: int):
+        """Build this turn's prompt: a string, or a message list in chat layout"""
+        print(f"\n{context_tag()}[AI Request #{i+1}]")
+        self._collect_scans()
+        with span("prompt.build") as build_span:
+            if self.conversation:
+                prompt = self.conversation.messages()
+                text = "\n".join(message["content"] for message in prompt[1:])
+            elif self.chat_layout:
+                parts = self.prompt.generate_parts(self.batch_size)
+                prompt = [{"role": "system", "content": SYSTEM_PROMPT}]
+                prompt.extend({"role": "user", "content": part} for part in parts if part)
+                text = "\n".join(part for part in parts if part)
+            else:
+                prompt = text = self.prompt.generate_prompt(self.batch_size)
+            build_span.set(bytes_out=len(text), tokens=estimate_tokens(text))
+        
+        # print the first 50 lines of the prompt for debugging
+        print(f"{context_tag()}[PROMPT]\n{text[:5000]}")
+        return prompt
+
+    def _extract_commands(self, response: str) -> List[str]:
+        if self.batch_size > 1:
+            return self.ai_provider.filter_commands(response, self.batch_size)
+        return [self.ai_provider.filter_command(response)]
+
+    def _record_late_output(self):
+        """Attach output that arrived after its command returned to that command"""
+        for command, output in self.command_executor.take_late_output():
+            self.prompt.add_system_info(f"Command '{command}' printed more output after returning:\n{output}")
+
+    def _record_turn(self, command: str, output: str) -> bool:
+        """Fold a command's output into the prompt; returns True on success"""
+        # Improved empty output detection
+        cleaned_output = self._clean_output(output)
+        print(f"{context_tag()}[OUTPUT]\n{cleaned_output}")
+        
+        # Handle empty/meaningless output
+        info = None
+        if self._is_empty_output(cleaned_output, command):
+            hint_msg = (
+                f"Command '{command}' returned empty output. "
+                f"Actual output was: {repr(output)}"
+            )
+            self.prompt.add_avoid(hint_msg)
+        elif output == "PASSWORD PROMPT!":
+            info = f"Command '{command}' requires a password. Please provide the password."
+        else:
+            info = f"Command '{command}' returned output:\n{cleaned_output}"
+        
+        self.prompt.add_command_history(command)
+        if self.conversation:
+            self.conversation.add_output(command, cleaned_output)
+        
+        # The latest output is shown once as Last Output, not also as system info
+        self.prompt.set_last_turn(command, cleaned_output, info)
+        
+        if RootDetector.got_root(self.hostname, cleaned_output, self.target):
+            self.success = True
+            print(f"\n{context_tag()}[SUCCESS] Root access achieved!")
+            summary = self.generate_summary()
+            print(f"\n{context_tag()}[SUMMARY]\n{summary}")
+            return True
+        return False
 
     def _clean_output(self, output: str) -> str:
         """Remove shell prompts and whitespace artifacts"""
@@ -174,7 +395,7 @@ class Session:
         
         return False
     
-    def _generate_summary(self) -> str:
+    def generate_summary(self) -> str:
         summary = "\n[START OF SUMMARY]\n"
         summary = "Privilege Escalation Summary:\n\n"
         summary += "Commands executed:\n"
@@ -183,6 +404,8 @@ class Session:
         summary += "\nSystem information:\n"
         for info in self.prompt.system_info:
             summary += f"- {info}\n"
+        if self.prompt.last_info and self.prompt.last_info not in self.prompt.system_info:
+            summary += f"- {self.prompt.last_info}\n"
         summary += "\nKnown facts:\n"
         for fact in self.prompt.facts:
             summary += f"- {fact}\n"
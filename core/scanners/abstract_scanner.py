@@ -1,11 +1,71 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List
+
+# Keywords that make a finding more likely to be an escalation vector
+SEVERITY_MARKERS = {
+    'nopasswd': 5,
+    'password': 4,
+    'suid': 3,
+    'sudo': 3,
+    'cve-': 3,
+    'writable': 3,
+    'capabilit': 2,
+    'docker': 2,
+    'cron': 2,
+    'root': 1,
+}
 
 class AbstractScanner(ABC):
+    name = "Scanner"
+
     @abstractmethod
     def run(self, command_executor) -> Dict[str, Any]:
         pass
 
     @abstractmethod
     def analyze(self, results: Dict[str, Any]) -> str:
-        pass
\ No newline at end of file
+        pass
+
+    def digest(self, results: Dict[str, Any], limit: int = 25) -> str:
+        """Compact, ranked and deduplicated summary of parsed findings for the prompt"""
+        if 'error' in results:
+            return f"{self.name} scan failed: {results['error']}"
+
+        findings = [self._summarize(vuln) for vuln in results.get('vulnerabilities', [])]
+        if not findings:
+            # Nothing structured was parsed; fall back to keyword hits in the raw output
+            findings = self._keyword_lines(results.get('raw_output', ''))
+
+        unique = list(dict.fromkeys(finding for finding in findings if finding))
+        if not unique:
+            return f"{self.name} reported no findings."
+
+        ranked = sorted(unique, key=self._severity, reverse=True)[:limit]
+        lines = [f"{len(ranked)} of {len(unique)} findings, most severe first:"]
+        lines.extend(f"- {finding}" for finding in ranked)
+        return "\n".join(lines)
+
+    def _summarize(self, vuln: Dict[str, Any]) -> str:
+        """One line per finding: '[section] finding' records, else all values joined"""
+        if 'finding' in vuln:
+            text = f"[{vuln['section']}] {vuln['finding']}" if vuln.get('section') else vuln['finding']
+        else:
+            text = " ".join(str(value) for value in vuln.values())
+        return self._clip(text)
+
+    def _keyword_lines(self, output: str) -> List[str]:
+        lines = []
+        for line in output.splitlines():
+            line = line.strip()
+            if line and self._severity(line) >= SEVERITY_MARKERS['suid']:
+                lines.append(self._clip(line))
+        return lines
+
+    @staticmethod
+    def _clip(text: str, width: int = 200) -> str:
+        return text if len(text) <= width else text[:width].rstrip() + "..."
+
+    @staticmethod
+    def _severity(finding: str) -> int:
+        lowered = finding.lower()
+        return sum(weight for marker, weight in SEVERITY_MARKERS.items() if marker in lowered)
@@ -3,25 +3,35 @@ import os
 from ..commands.abstract_command import AbstractCommand
 from ..scanners.abstract_scanner import AbstractScanner
 from core.utils.logger import debug_logger
-from typing import Dict, Any
+from core.utils.tracer import span
+from core.scanners.tool_cache import ToolCache
+from typing import Dict, Any, Optional
 
 class BeRootScanner(AbstractScanner):
-    def __init__(self):
+    name = "BeRoot"
+
+    def __init__(self, tool_cache: Optional[ToolCache] = None):
         self.local_path = 'external_tools/Linux/BeRoot'
-        self.remote_path = '/tmp'
+        self.tool_cache = tool_cache or ToolCache.shared()
         
     def run(self, command_executor: AbstractCommand) -> Dict[str, Any]:
         try:
-            # Upload BeRoot
-            command_executor.upload(f"{self.local_path}", self.remote_path)
+            # Upload BeRoot unless the target already holds this version
+            with span("scanner.upload", path=self.local_path):
+                remote_dir = self.tool_cache.resolve(command_executor, self.local_path)
             
             # Run BeRoot
-            command = f"python3 {self.remote_path}/BeRoot/beroot.py 2>/dev/null"
-            output = command_executor.execute(command)
+            command = f"python3 {remote_dir}/beroot.py 2>/dev/null"
+            with span("scanner.run", command=command) as run_span:
+                output = command_executor.exec_command(command)
+                run_span.set(bytes_out=len(output))
+            
+            with span("scanner.parse"):
+                vulnerabilities = self._parse_output(output)
             
             return {
                 'raw_output': output,
-                'vulnerabilities': self._parse_output(output)
+                'vulnerabilities': vulnerabilities
             }
         except Exception as e:
             debug_logger.error(f"BeRoot scan failed: {str(e)}")
@@ -48,6 +58,9 @@ class BeRootScanner(AbstractScanner):
             
         return vulnerabilities
 
+    def _summarize(self, vuln: Dict[str, Any]) -> str:
+        return self._clip(f"{vuln['type']}: {'; '.join(vuln['details'][:3])}")
+
     def analyze(self, results: Dict[str, Any]) -> str:
         if 'error' in results:
             return f"BeRoot scan failed: {results['error']}"
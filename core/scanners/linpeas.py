@@ -3,28 +3,35 @@ import os
 from ..commands.abstract_command import AbstractCommand
 from ..scanners.abstract_scanner import AbstractScanner
 from core.utils.logger import debug_logger
-from typing import Dict, Any
+from core.utils.tracer import span
+from core.scanners.tool_cache import ToolCache
+from typing import Dict, Any, Optional
 
 class LinPEASScanner(AbstractScanner):
-    def __init__(self):
+    name = "linPEAS"
+
+    def __init__(self, tool_cache: Optional[ToolCache] = None):
         self.local_path = "external_tools/Linux/linpeas"
-        self.remote_path = "/tmp"
+        self.tool_cache = tool_cache or ToolCache.shared()
         
     def run(self, command_executor: AbstractCommand) -> Dict[str, Any]:
         try:
-            # Upload linPEAS
-            command_executor.upload(
-                f"{self.local_path}/linpeas.sh",
-                f"{self.remote_path}/linpeas.sh"
-            )
+            # Upload linPEAS unless the target already holds this version
+            with span("scanner.upload", path=f"{self.local_path}/linpeas.sh"):
+                script = self.tool_cache.resolve(command_executor, f"{self.local_path}/linpeas.sh")
             
             # Make executable and run
-            command_executor.execute(f"chmod +x {self.remote_path}/linpeas.sh")
-            output = command_executor.execute(f"{self.remote_path}/linpeas.sh -a")
+            with span("scanner.run", command=f"{script} -a") as run_span:
+                # chmod and run in one round trip
+                output = command_executor.exec_command(f"chmod +x {script} && {script} -a")
+                run_span.set(bytes_out=len(output))
+            
+            with span("scanner.parse"):
+                vulnerabilities = self._parse_output(output)
             
             return {
                 'raw_output': output,
-                'vulnerabilities': self._parse_output(output)
+                'vulnerabilities': vulnerabilities
             }
         except Exception as e:
             debug_logger.error(f"linPEAS scan failed: {str(e)}")
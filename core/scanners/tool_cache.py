@@ -0,0 +1,95 @@
+import json
+import os
+import posixpath
+import shlex
+import threading
+from typing import Dict, Optional
+from core.commands.abstract_command import AbstractCommand
+from core.commands.transfer import manifest_hash
+from core.utils.logger import debug_logger
+from core.utils.tracer import span
+
+# Directory on targets holding one subdirectory per tool bundle hash
+DEFAULT_REMOTE_ROOT = "/tmp/.climbsage-tools"
+
+class ToolCache:
+    """Content-addressed tool placement on targets, with a local host index
+
+    A bundle lives at <remote_root>/<sha256 prefix>/<name>, so any version
+    already on a target is found by its hash and never uploaded twice, one
+    existence check per resolve. The index remembers which hosts hold which
+    bundles across sessions.
+    """
+
+    _shared: Optional['ToolCache'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, index_path: str = "cache/tools/index.json",
+                 remote_root: Optional[str] = None):
+        self.index_path = index_path
+        self.remote_root = remote_root or os.getenv('TOOL_CACHE_DIR', DEFAULT_REMOTE_ROOT)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> 'ToolCache':
+        """Process-wide cache, so concurrent fleet sessions share one index"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def resolve(self, executor: AbstractCommand, local_path: str) -> str:
+        """Remote path of the bundle on the executor's host, uploading it only if missing"""
+        digest = manifest_hash(local_path)
+        remote_dir = posixpath.join(self.remote_root, digest[:16])
+        name = os.path.basename(os.path.normpath(local_path))
+        target = posixpath.join(remote_dir, name)
+        host = executor.host_id
+
+        with span("tool_cache.resolve", tool=name, host=host) as resolve_span:
+            indexed = self._lookup(host, digest) == target
+            # One existence check either way: the index may outlive the target's
+            # /tmp, and another workstation or login may have placed the bundle
+            if self._present(executor, target):
+                debug_logger.debug(f"Tool cache hit: {name} at {target} on {host}")
+                resolve_span.set(hit=True, indexed=indexed)
+                if not indexed:
+                    self._record(host, digest, target)
+                return target
+
+            # Known to be missing: upload without checking again
+            resolve_span.set(hit=False)
+            destination = remote_dir if os.path.isdir(local_path) else target
+            if not executor.upload(local_path, destination, check=False):
+                raise RuntimeError(f"Failed to upload {local_path} to {host}")
+            self._record(host, digest, target)
+            return target
+
+    @staticmethod
+    def _present(executor: AbstractCommand, target: str) -> bool:
+        output = executor.exec_command(f"test -e {shlex.quote(target)} && echo present")
+        return output.strip().endswith("present")
+
+    def _load(self) -> Dict[str, Dict[str, str]]:
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _lookup(self, host: str, digest: str) -> Optional[str]:
+        with self.lock:
+            return self._load().get(host, {}).get(digest)
+
+    def _record(self, host: str, digest: str, target: str):
+        with self.lock:
+            index = self._load()  # Re-read so other sessions' entries are kept
+            index.setdefault(host, {})[digest] = target
+            try:
+                os.makedirs(os.path.dirname(self.index_path) or '.', exist_ok=True)
+                tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(index, f, indent=2)
+                os.replace(tmp_path, self.index_path)
+            except OSError as e:
+                debug_logger.error(f"Failed to write tool cache index: {str(e)}")
@@ -3,9 +3,12 @@ import os
 from ..commands.abstract_command import AbstractCommand
 from ..scanners.abstract_scanner import AbstractScanner
 from core.utils.logger import debug_logger
+from core.utils.tracer import span
 from typing import Dict, Any
 
 class WinPEASScanner(AbstractScanner):
+    name = "WinPEAS"
+
     def __init__(self):
         self.local_path = "external_tools/Windows/winpeas"
         self.remote_path = "C:\\Windows\\Temp"
@@ -13,17 +16,23 @@ class WinPEASScanner(AbstractScanner):
     def run(self, command_executor: AbstractCommand) -> Dict[str, Any]:
         try:
             # Upload WinPEAS
-            command_executor.upload(
-                f"{self.local_path}/winpeas.exe",
-                f"{self.remote_path}\\winpeas.exe"
-            )
+            with span("scanner.upload", path=f"{self.local_path}/winpeas.exe"):
+                command_executor.upload(
+                    f"{self.local_path}/winpeas.exe",
+                    f"{self.remote_path}\\winpeas.exe"
+                )
             
             # Run WinPEAS (no need for chmod on Windows)
-            output = command_executor.execute(f"{self.remote_path}\\winpeas.exe quiet")
+            with span("scanner.run", command=f"{self.remote_path}\\winpeas.exe quiet") as run_span:
+                output = command_executor.exec_command(f"{self.remote_path}\\winpeas.exe quiet")
+                run_span.set(bytes_out=len(output))
+            
+            with span("scanner.parse"):
+                vulnerabilities = self._parse_output(output)
             
             return {
                 'raw_output': output,
-                'vulnerabilities': self._parse_output(output)
+                'vulnerabilities': vulnerabilities
             }
         except Exception as e:
             debug_logger.error(f"WinPEAS scan failed: {str(e)}")
@@ -1,17 +1,38 @@
+import contextvars
 import logging
 import os
+import re
 from datetime import datetime
 
+# Identifies the session (e.g. target host) a log record belongs to
+DEFAULT_CONTEXT = 'main'
+log_context = contextvars.ContextVar('log_context', default=DEFAULT_CONTEXT)
+
+def context_label() -> str:
+    """The log context made safe for file names"""
+    return re.sub(r'[^\w.-]', '_', log_context.get())
+
+def context_tag() -> str:
+    """'[host] ' for console lines of a fleet session, empty for a lone session"""
+    context = log_context.get()
+    return "" if context == DEFAULT_CONTEXT else f"[{context}] "
+
+class ContextFilter(logging.Filter):
+    def filter(self, record):
+        record.context = log_context.get()
+        return True
+
 def setup_logger(name: str, log_file: str, level=logging.DEBUG):
     logger = logging.getLogger(name)
     logger.setLevel(level)
+    logger.addFilter(ContextFilter())
     
     # Create logs directory if it doesn't exist
     os.makedirs('logs', exist_ok=True)
     
     handler = logging.FileHandler(f'logs/{log_file}')
     formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        '%(asctime)s - %(name)s - [%(context)s] - %(levelname)s - %(message)s'
     )
     handler.setFormatter(formatter)
     logger.addHandler(handler)
@@ -24,4 +45,4 @@ def setup_logger(name: str, log_file: str, level=logging.DEBUG):
     return logger
 
 debug_logger = setup_logger('debug', 'debug.log')
-time_logger = setup_logger('time', 'times.log', logging.INFO)
\ No newline at end of file
+time_logger = setup_logger('time', 'times.log', logging.INFO)
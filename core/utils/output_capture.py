@@ -0,0 +1,154 @@
+import codecs
+import itertools
+import os
+import shutil
+from datetime import datetime
+from typing import List, Optional
+from core.utils.logger import debug_logger, context_label
+
+# Characters of a command's output kept in memory (half head, half tail)
+DEFAULT_MAX_OUTPUT = 64 * 1024
+# Characters decoded per read when skipping into a spilled output
+READ_CHUNK = 64 * 1024
+
+def default_max_output() -> int:
+    limit = int(os.getenv('MAX_OUTPUT', DEFAULT_MAX_OUTPUT))
+    if limit < 1:
+        raise ValueError(f"MAX_OUTPUT must be at least 1, got {limit}")
+    return limit
+
+
+def bounded_view(text: str, limit: Optional[int]) -> str:
+    """Head and tail view of text already in memory, e.g. one command's share of a batch"""
+    capture = OutputCapture(limit)
+    capture.add(text)
+    return capture.view()
+
+
+class OutputStore:
+    """Per-session directory holding the full output of commands that overflowed
+
+    Outputs are addressed by the integer handle quoted in their truncated view.
+    Offsets into them are in characters, like the view and its limit. The
+    directory only lives as long as the session: close removes it.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        if directory is None:
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+            directory = os.path.join("logs/output", f"{context_label()}-{stamp}")
+        self.directory = directory
+        self._handles = itertools.count(1)
+
+    def new_capture(self, limit: Optional[int]) -> 'OutputCapture':
+        return OutputCapture(limit, self, next(self._handles))
+
+    def path(self, handle: int) -> str:
+        return os.path.join(self.directory, f"{handle}.out")
+
+    def read(self, handle: int, start: int = 0, end: Optional[int] = None) -> str:
+        """Characters start..end of a spilled output"""
+        try:
+            with open(self.path(handle), 'r', encoding='utf-8', errors='ignore', newline='') as f:
+                skipped = 0
+                while skipped < start:
+                    chunk = f.read(min(READ_CHUNK, start - skipped))
+                    if not chunk:
+                        return ""
+                    skipped += len(chunk)
+                return f.read() if end is None else f.read(max(end - start, 0))
+        except OSError as e:
+            debug_logger.error(f"Failed to read output #{handle}: {str(e)}")
+            return ""
+
+    def close(self):
+        """Remove the spilled outputs; handles quoted earlier no longer resolve"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class OutputCapture:
+    """Keeps the head and tail of a command's output and spills all of it to disk
+
+    Limits and offsets count characters of decoded text. Nothing touches the
+    disk until the output outgrows the limit; a limit of None keeps everything
+    in memory.
+    """
+
+    def __init__(self, limit: Optional[int] = None, store: Optional[OutputStore] = None,
+                 handle: Optional[int] = None):
+        if limit is not None and limit < 1:
+            raise ValueError(f"Output limit must be at least 1, got {limit}")
+        self.limit = limit
+        self.head_limit = limit // 2 if limit is not None else None
+        self.tail_limit = limit - self.head_limit if limit is not None else 0
+        self.store = store
+        self.handle = handle
+        self.head: List[str] = []
+        self.head_length = 0
+        self.tail = ""
+        self.length = 0  # Characters seen
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+        self._spill = None
+
+    def feed(self, data: bytes) -> str:
+        """Add raw output; returns the newly decoded text"""
+        text = self.decoder.decode(data)
+        self.add(text)
+        return text
+
+    def add(self, text: str):
+        if not text:
+            return
+        if self.limit is not None and self.length + len(text) > self.limit:
+            self._spill_write(text)
+        self.length += len(text)
+
+        if self.head_limit is None or self.head_length < self.head_limit:
+            keep = text if self.head_limit is None else text[:self.head_limit - self.head_length]
+            self.head.append(keep)
+            self.head_length += len(keep)
+            text = text[len(keep):]
+        if text and self.tail_limit:
+            self.tail = (self.tail + text)[-self.tail_limit:]
+
+    def _spill_write(self, text: str):
+        if self.store is None:
+            return
+        try:
+            if self._spill is None:
+                os.makedirs(self.store.directory, exist_ok=True)
+                self._spill = open(self.store.path(self.handle), 'wb')
+                # Nothing was dropped yet, so head and tail are the stream so far
+                self._spill.write(("".join(self.head) + self.tail).encode('utf-8'))
+            self._spill.write(text.encode('utf-8'))
+        except OSError as e:
+            debug_logger.error(f"Failed to spill output #{self.handle}: {str(e)}")
+            self.store = None
+
+    @property
+    def omitted(self) -> int:
+        return self.length - self.head_length - len(self.tail)
+
+    def view(self, end: Optional[int] = None) -> str:
+        """Head and tail of the output up to character offset end, with a note on what was left out"""
+        head = "".join(self.head)
+        self.head = [head]  # Join once; later calls reuse it
+        tail = self.tail
+        if end is not None and end < self.length:
+            cut = self.length - end
+            if cut <= len(tail):
+                tail = tail[:len(tail) - cut]
+            else:
+                tail = ""
+                head = head[:end]
+
+        if not self.omitted:
+            return head + tail
+        note = f"{self.omitted} of {self.length} characters omitted"
+        if self._spill is not None:
+            note += f"; full text is output #{self.handle}"
+        return f"{head}\n[... {note} ...]\n{tail}"
+
+    def close(self):
+        if self._spill is not None:
+            self._spill.close()
@@ -0,0 +1,160 @@
+import asyncio
+import os
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from core.utils.logger import debug_logger
+
+class TokenBucket:
+    """Refills continuously up to a per-minute capacity; None means unlimited"""
+
+    def __init__(self, per_minute: Optional[float] = None):
+        self.capacity = per_minute
+        self.level = per_minute or 0.0
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if self.capacity is None:
+            return
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        if self.capacity is None:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.capacity)  # Oversized requests wait for a full bucket
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60 / self.capacity
+
+    def consume(self, amount: float):
+        if self.capacity is not None:
+            self.level -= min(amount, self.capacity)
+
+    def limit_remaining(self, remaining: float):
+        """Trust the provider's view of the budget when it is lower than ours"""
+        if self.capacity is not None:
+            self.level = min(self.level, remaining)
+
+
+class RateLimiter:
+    """Requests/tokens-per-minute limiter shared by every client of a provider"""
+
+    _registry: Dict[str, 'RateLimiter'] = {}
+    _registry_lock = threading.Lock()
+
+    DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+
+    def __init__(self, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def for_provider(cls, name: str, **kwargs) -> 'RateLimiter':
+        """Return the process-wide limiter for a provider, creating it once
+
+        Limits default to the <PROVIDER>_RPM and <PROVIDER>_TPM environment variables.
+        """
+        with cls._registry_lock:
+            if name not in cls._registry:
+                kwargs.setdefault('requests_per_minute', cls._parse_float(os.getenv(f"{name.upper()}_RPM")))
+                kwargs.setdefault('tokens_per_minute', cls._parse_float(os.getenv(f"{name.upper()}_TPM")))
+                cls._registry[name] = cls(**kwargs)
+            return cls._registry[name]
+
+    def _reserve(self, tokens: int) -> float:
+        with self.lock:
+            now = time.monotonic()
+            wait = max(
+                self.blocked_until - now,
+                self.requests.wait_time(1, now),
+                self.tokens.wait_time(tokens, now)
+            )
+            if wait <= 0:
+                self.requests.consume(1)
+                self.tokens.consume(tokens)
+            return wait
+
+    def acquire(self, tokens: int = 0):
+        """Block only while the request or token budget is exhausted"""
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                return
+            debug_logger.debug(f"Rate limit reached, waiting {wait:.2f}s")
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: int = 0):
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                return
+            debug_logger.debug(f"Rate limit reached, waiting {wait:.2f}s")
+            await asyncio.sleep(wait)
+
+    def penalize(self, seconds: float):
+        """Hold every caller back for at least the given number of seconds"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers) -> Optional[float]:
+        """Apply x-ratelimit-* and Retry-After headers; returns the retry delay if any"""
+        retry_after = self._parse_retry_after(headers)
+        remaining_requests = self._parse_float(headers.get('x-ratelimit-remaining-requests'))
+        remaining_tokens = self._parse_float(headers.get('x-ratelimit-remaining-tokens'))
+
+        with self.lock:
+            now = time.monotonic()
+            if remaining_requests is not None:
+                self.requests.limit_remaining(remaining_requests)
+                if remaining_requests <= 0:
+                    reset = self._parse_duration(headers.get('x-ratelimit-reset-requests'))
+                    self.blocked_until = max(self.blocked_until, now + (reset or 1.0))
+            if remaining_tokens is not None:
+                self.tokens.limit_remaining(remaining_tokens)
+                if remaining_tokens <= 0:
+                    reset = self._parse_duration(headers.get('x-ratelimit-reset-tokens'))
+                    self.blocked_until = max(self.blocked_until, now + (reset or 1.0))
+            if retry_after is not None:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+
+        return retry_after
+
+    def _parse_retry_after(self, headers) -> Optional[float]:
+        retry_after_ms = self._parse_float(headers.get('retry-after-ms'))
+        if retry_after_ms is not None:
+            return retry_after_ms / 1000
+        value = headers.get('retry-after')
+        if not value:
+            return None
+        seconds = self._parse_float(value)
+        if seconds is not None:
+            return seconds
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _parse_duration(self, value: Optional[str]) -> Optional[float]:
+        """Parse reset durations such as '1s', '6m0s' or '20ms'"""
+        if not value:
+            return None
+        seconds = self._parse_float(value)
+        if seconds is not None:
+            return seconds
+        units = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+        parts = self.DURATION_PART.findall(value)
+        return sum(float(amount) * units[unit] for amount, unit in parts) if parts else None
+
+    @staticmethod
+    def _parse_float(value) -> Optional[float]:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
@@ -0,0 +1,62 @@
+# receive_buffer.py
+
+import re
+from typing import Optional, Pattern, Tuple
+from core.utils.output_capture import OutputCapture
+
+# Shell prompts (bash/zsh, root, Python, IPython, csh/tcsh)
+PROMPT_PATTERN = r'(?P<prompt>\$ $|# $|>>> |In \[\d+\]: |\? $)'
+
+# Password prompts, combined with whatever marks the end of a command
+PASSWORD_PATTERN = r'(?P<password>[Pp]assword:|[Pp]assphrase:|Enter [Pp]assword)'
+
+PROMPT_MATCHER = re.compile(PROMPT_PATTERN + r'|' + PASSWORD_PATTERN)
+TRAILING_PROMPT = re.compile(PROMPT_PATTERN)
+TRAILING_PASSWORD = re.compile(PASSWORD_PATTERN + r'\s*$')
+
+# Longest prompt or marker we need to catch when it straddles two chunks
+TAIL_OVERLAP = 64
+
+class ReceiveBuffer:
+    """Accumulates shell output in linear time and spots prompts in new data only
+
+    Storage is delegated to an OutputCapture, which may keep only the head and tail.
+
+    Any named group of the matcher that matches (e.g. 'prompt') ends the
+    wait; a 'password' group only does so when nothing else matches.
+    """
+
+    def __init__(self, matcher: Pattern = PROMPT_MATCHER, capture: Optional[OutputCapture] = None):
+        self.matcher = matcher
+        self.capture = capture or OutputCapture()  # Unbounded unless given a limit
+        self.tail = ""
+
+    def feed(self, data: bytes) -> Optional[Tuple[str, int, re.Match]]:
+        """Add a chunk; returns (group name, offset, match) once a group matches"""
+        window_start = self.capture.length - len(self.tail)
+        text = self.capture.feed(data)
+        window = self.tail + text
+        self.tail = window[-TAIL_OVERLAP:]
+
+        password = None
+        for match in self.matcher.finditer(window):
+            if not match.groupdict().get('password'):
+                kind = next(name for name, value in match.groupdict().items() if value is not None)
+                return kind, window_start + match.start(), match
+            if password is None:
+                password = ('password', window_start + match.start(), match)
+        return password
+
+    def match_tail(self, matcher: Pattern) -> Optional[Tuple[str, int, re.Match]]:
+        """Match against the most recent data only, e.g. to spot a trailing prompt"""
+        match = matcher.search(self.tail)
+        if match is None:
+            return None
+        kind = next(name for name, value in match.groupdict().items() if value is not None)
+        return kind, self.capture.length - len(self.tail) + match.start(), match
+
+    def text(self, end: Optional[int] = None) -> str:
+        return self.capture.view(end)
+
+    def __len__(self) -> int:
+        return self.capture.length
@@ -1,30 +1,34 @@
 from datetime import datetime, timedelta
-from core.utils.logger import debug_logger, time_logger
+from core.utils.logger import debug_logger, time_logger, context_tag
 import os
+import threading
 
-class GlobalTimer:
-    _start_time = None
+class Timer:
     _markdown_file = "TIMES.md"
+    _markdown_lock = threading.Lock()  # Timers of concurrent sessions share one file
 
-    @classmethod
-    def start(cls):
-        cls._start_time = datetime.now()
+    def __init__(self):
+        self._start_time = None
+        self.elapsed = None
+
+    def start(self):
+        self._start_time = datetime.now()
         debug_logger.debug("Timer started")
 
-    @classmethod
-    def stop(cls, description: str = ""):
-        if cls._start_time is None:
+    def stop(self, description: str = ""):
+        if self._start_time is None:
             debug_logger.warning("Timer stopped without being started")
             return
 
         end_time = datetime.now()
-        elapsed = end_time - cls._start_time
-        cls._start_time = None
+        self.elapsed = end_time - self._start_time
+        self._start_time = None
 
         time_logger.info(
-            f"{description} - Elapsed: {elapsed.total_seconds():.2f}s"
+            f"{description} - Elapsed: {self.elapsed.total_seconds():.2f}s"
         )
-        cls._log_to_markdown(description, end_time, elapsed)
+        # The markdown table has no context column, so fleet entries carry their host
+        self._log_to_markdown(f"{context_tag()}{description}", end_time, self.elapsed)
         debug_logger.debug(f"Timer stopped - {description}")
 
     @classmethod
@@ -39,13 +43,27 @@ class GlobalTimer:
         )
 
         try:
-            if not os.path.exists(filepath):
-                with open(filepath, 'w') as f:
-                    f.write("# Execution Times\n\n")
-                    f.write("| Description | End Time | Elapsed |\n")
-                    f.write("|-------------|----------|---------|\n")
-
-            with open(filepath, 'a') as f:
-                f.write(entry)
+            with cls._markdown_lock:
+                if not os.path.exists(filepath):
+                    with open(filepath, 'w') as f:
+                        f.write("# Execution Times\n\n")
+                        f.write("| Description | End Time | Elapsed |\n")
+                        f.write("|-------------|----------|---------|\n")
+
+                with open(filepath, 'a') as f:
+                    f.write(entry)
         except Exception as e:
-            debug_logger.error(f"Failed to write to markdown file: {str(e)}")
\ No newline at end of file
+            debug_logger.error(f"Failed to write to markdown file: {str(e)}")
+
+
+class GlobalTimer:
+    """Process-wide timer kept for single-session callers"""
+    _timer = Timer()
+
+    @classmethod
+    def start(cls):
+        cls._timer.start()
+
+    @classmethod
+    def stop(cls, description: str = ""):
+        cls._timer.stop(description)
@@ -0,0 +1,7 @@
+# tokens.py
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate (~4 characters per token for English/shell text)"""
+    if not text:
+        return 0
+    return len(text) // 4 + 1
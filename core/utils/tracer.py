@@ -0,0 +1,128 @@
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+_current_tracer = contextvars.ContextVar('current_tracer', default=None)
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+class Span:
+    def __init__(self, span_id: int, name: str, parent_id: Optional[int], attributes: Dict[str, Any]):
+        self.id = span_id
+        self.name = name
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.thread_id = threading.get_ident()
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+
+class _NullSpan:
+    """Returned when no tracer is active so call sites never need to check"""
+
+    def set(self, **attributes):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Collects nested spans and exports them as Chrome trace events or JSONL"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self.origin = time.perf_counter()
+        self.started_at = time.time()
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def activate(self):
+        """Make this tracer the target of module-level span() calls in this context"""
+        token = _current_tracer.set(self)
+        try:
+            yield self
+        finally:
+            _current_tracer.reset(token)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        parent = _current_span.get()
+        current = Span(next(self._ids), name, parent.id if parent else None, attributes)
+        token = _current_span.set(current)
+        try:
+            yield current
+        except Exception as e:
+            current.set(error=str(e))
+            raise
+        finally:
+            current.end = time.perf_counter()
+            _current_span.reset(token)
+            with self.lock:
+                self.spans.append(current)
+
+    def _to_dict(self, span: Span) -> dict:
+        return {
+            'id': span.id,
+            'parent_id': span.parent_id,
+            'name': span.name,
+            'start_s': span.start - self.origin,
+            'duration_s': (span.end or span.start) - span.start,
+            'thread_id': span.thread_id,
+            'attributes': span.attributes,
+        }
+
+    def export_jsonl(self, path: str):
+        with self.lock:
+            spans = sorted(self.spans, key=lambda span: span.start)
+        with open(path, 'w') as f:
+            for span in spans:
+                f.write(json.dumps(self._to_dict(span), default=str) + "\n")
+
+    def export_chrome(self, path: str):
+        """Write complete ('X') trace events loadable in chrome://tracing or Perfetto"""
+        pid = os.getpid()
+        with self.lock:
+            spans = sorted(self.spans, key=lambda span: span.start)
+        events = [{
+            'name': span.name,
+            'ph': 'X',
+            'ts': (span.start - self.origin) * 1e6,
+            'dur': ((span.end or span.start) - span.start) * 1e6,
+            'pid': pid,
+            'tid': span.thread_id,
+            'args': {**span.attributes, 'id': span.id, 'parent_id': span.parent_id},
+        } for span in spans]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, default=str)
+
+
+class _NullTracer:
+    """Stands in for a Tracer when tracing is off: activating it records nothing"""
+
+    @contextmanager
+    def activate(self):
+        yield self
+
+
+NULL_TRACER = _NullTracer()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Open a span on the active tracer, or do nothing if tracing is off"""
+    tracer = _current_tracer.get()
+    if tracer is None:
+        yield NULL_SPAN
+        return
+    with tracer.span(name, **attributes) as current:
+        yield current
@@ -0,0 +1,44 @@
+from core.ai.command_extractor import CommandExtractor
+
+
+def stream(text, size=3):
+    """Yield text in small chunks, like a streaming completion"""
+    for i in range(0, len(text), size):
+        yield text[i:i + size]
+
+
+def test_stops_after_closed_fence():
+    text = "Check sudo rights:\n```bash\nsudo -l\n```\nThis lists what we may run."
+    seen = CommandExtractor().consume(stream(text))
+    assert seen.rstrip().endswith("```")
+    assert "This lists" not in seen
+
+
+def test_prose_first_line_reads_the_full_stream():
+    text = "Let me check sudo rights.\nI will list them next.\n```bash\nsudo -l\n```"
+    assert CommandExtractor().consume(stream(text)) == text
+
+
+def test_prose_with_inline_code_waits_for_the_fence():
+    text = "Let me look at `/etc/passwd` first:\n```\ncat /etc/passwd\n```"
+    assert CommandExtractor().consume(stream(text)) == text
+
+
+def test_stops_after_inline_code_line():
+    text = "`id`\nThis shows the current user."
+    seen = CommandExtractor().consume(stream(text))
+    assert seen.startswith("`id`\n")
+    assert "shows" not in seen
+
+
+def test_stops_after_json_array():
+    text = '[\n  "id",\n  "sudo -l"\n]\nRanked by likelihood.'
+    seen = CommandExtractor().consume(stream(text))
+    assert seen.strip().endswith("]")
+    assert "Ranked" not in seen
+
+
+def test_unfinished_json_array_keeps_reading():
+    extractor = CommandExtractor()
+    assert not extractor.feed('["id", "echo ]"\n')
+    assert extractor.feed(']\n')
@@ -0,0 +1,25 @@
+from core.models.conversation import Conversation
+from core.models.prompt import PrivEscPrompt
+
+
+def is_prefix(previous, current):
+    return current[:len(previous)] == previous
+
+
+def test_prefix_changes_only_when_the_window_slides():
+    prompt = PrivEscPrompt('user', 'pass', 'linux', 'root', token_budget=8000)
+    conversation = Conversation(prompt, "system", window=8)
+    previous, misses = [], 0
+    for i in range(40):
+        conversation.add_response(f"cat /etc/file{i}")
+        conversation.add_output(f"cat /etc/file{i}", f"line {i}")
+        prompt.add_avoid(f"Command 'ls /nope{i}' returned empty output.")
+        messages = conversation.messages()
+        cacheable = messages[:-1]  # The trailing avoid message is rewritten every turn
+        misses += not is_prefix(previous, cacheable)
+        previous = cacheable
+        assert len(conversation.turns) <= 8
+        assert "Avoid" in messages[-1]["content"]
+    # One slide per four turns once the window is full
+    assert misses == 8
+    assert "cat /etc/file0 -> line 0" in messages[2]["content"]
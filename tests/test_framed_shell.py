@@ -0,0 +1,59 @@
+import asyncio
+import re
+from core.commands.framed_shell import FramedShellCommand
+
+FRAME = re.compile(r"__CS_%s_([0-9a-f]+)__\\n' BEGIN; \{\n(.*)\n\}; printf", re.S)
+
+
+class FakeShell(FramedShellCommand):
+    """Answers each framed command with 'ran: <command>' and exit status 3"""
+
+    supports_async_io = True
+
+    def __init__(self):
+        super().__init__("host", 22, "user", "pass")
+        self.shell = True
+        self.pending = b""
+
+    def connect(self):
+        self.shell = True
+
+    def _send_line(self, data: bytes):
+        token, command = FRAME.search(data.decode()).groups()
+        output = "" if "stty" in command else f"ran: {command}"
+        self.pending += f"__CS_BEGIN_{token}__\r\n{output}\r\n__CS_END_{token}_3__\r\n$ ".encode()
+
+    def _recv(self, timeout: float) -> bytes:
+        data, self.pending = self.pending, b""
+        return data
+
+    async def _arecv(self, timeout: float) -> bytes:
+        if not self.pending:
+            await asyncio.sleep(timeout)
+        return self._recv(timeout)
+
+    def _exec_with_input(self, command, data):
+        return 0, ""
+
+    def _upload_plain(self, local_path, remote_path):
+        pass
+
+    def download_file(self, remote_path, local_path):
+        return False
+
+
+def test_aexecute_waits_on_the_event_loop():
+    shell = FakeShell()
+    assert asyncio.run(shell.aexecute("id")) == "ran: id"
+    assert shell.last_exit_status == 3
+
+
+def test_aexecute_matches_execute():
+    assert asyncio.run(FakeShell().aexecute("uname -a")) == FakeShell().execute("uname -a")
+
+
+def test_setup_shell_keeps_the_command_status():
+    shell = FakeShell()
+    shell.last_exit_status = 7
+    asyncio.run(shell._asetup_shell())
+    assert shell.last_exit_status == 7
@@ -0,0 +1,95 @@
+import pytest
+from core.commands.framed_shell import FramedShellCommand
+from core.commands.framing import (extract_output, frame_command, frame_matcher, frame_script,
+                                   parse_end, split_frames, strip_prompts, sub_token)
+from core.utils.output_capture import bounded_view
+from core.utils.receive_buffer import ReceiveBuffer
+
+
+def framed_run(token, output, status):
+    """What a shell with echo off prints for a framed command"""
+    return f"__CS_BEGIN_{token}__\r\n{output}\r\n__CS_END_{token}_{status}__\r\n"
+
+
+def test_frame_command_markers_are_not_echoed_verbatim():
+    framed = frame_command("id", "abc123")
+    assert "__CS_BEGIN_abc123__" not in framed
+    assert "__CS_END_abc123" not in framed
+    assert "\nid\n" in framed
+
+
+def test_frame_matcher_reads_status_and_output():
+    buffer = ReceiveBuffer(frame_matcher("abc123"))
+    kind, offset, match = buffer.feed(framed_run("abc123", "uid=0(root)", 0).encode())
+    assert kind == 'end'
+    assert parse_end(match) == 0
+    assert extract_output(buffer.text(offset), "abc123") == "uid=0(root)"
+
+
+def test_frame_matcher_ignores_other_tokens_and_split_chunks():
+    buffer = ReceiveBuffer(frame_matcher("abc123"))
+    assert buffer.feed(framed_run("ffff00", "old", 1).encode()) is None
+    data = framed_run("abc123", "x", 2).encode()
+    assert buffer.feed(data[:-12]) is None
+    kind, _, match = buffer.feed(data[-12:])
+    assert kind == 'end' and parse_end(match) == 2
+
+
+def test_password_in_output_does_not_end_the_frame():
+    buffer = ReceiveBuffer(frame_matcher("abc123"))
+    assert buffer.feed(b"__CS_BEGIN_abc123__\r\n/etc/app.conf: db_password: hunter2\r\n") is None
+    assert FramedShellCommand._settled_prompt(buffer, 5.0) is None
+    kind, _, _ = buffer.feed(b"\r\n__CS_END_abc123_0__\r\n")
+    assert kind == 'end'
+
+
+def test_trailing_password_prompt_needs_idle_tail():
+    buffer = ReceiveBuffer(frame_matcher("abc123"))
+    assert buffer.feed(b"__CS_BEGIN_abc123__\r\nPassword: ") is None
+    assert FramedShellCommand._settled_prompt(buffer, 0.5) is None
+    assert FramedShellCommand._settled_prompt(buffer, 1.0)[0] == 'password'
+
+
+def test_accept_prompt_matches_a_fresh_shell_prompt():
+    buffer = ReceiveBuffer(frame_matcher("abc123", accept_prompt=True))
+    kind, _, _ = buffer.feed(b"\r\nroot@box:~# ")
+    assert kind == 'prompt'
+
+
+@pytest.mark.parametrize("prompt", ["$", "$ ", "# ", "sh-5.1$", "user@ip-10-0-0-1:/tmp$", "root@box:~#", "[user@box tmp]$ "])
+def test_strip_prompts_drops_prompt_only_lines(prompt):
+    assert strip_prompts(prompt) == ""
+    assert strip_prompts(f"late line\n{prompt}") == "late line"
+
+
+def test_strip_prompts_keeps_output():
+    assert strip_prompts("total 0\ncost: 5$ each") == "total 0\ncost: 5$ each"
+
+
+def test_frame_script_frames_each_command_with_a_sub_token():
+    script = frame_script(["id", "uname -a"], "abc123")
+    assert script == frame_command("id", sub_token("abc123", 0)) + "\n" + frame_command("uname -a", sub_token("abc123", 1))
+
+
+def test_split_frames_demultiplexes_outputs_and_statuses():
+    text = framed_run(sub_token("abc123", 0), "uid=0(root)", 0) + framed_run(sub_token("abc123", 1), "", 127)
+    assert split_frames(text, "abc123", 2) == [("uid=0(root)", 0), ("", 127)]
+
+
+def test_split_frames_marks_cut_and_missing_commands():
+    text = framed_run(sub_token("abc123", 0), "a", 0) + f"__CS_BEGIN_{sub_token('abc123', 1)}__\r\npartial"
+    assert split_frames(text, "abc123", 3) == [("a", 0), ("partial", None), (None, None)]
+
+
+def test_split_frames_stops_at_the_next_frame_when_an_end_is_omitted():
+    text = "".join(framed_run(sub_token("abc123", i), output, 0)
+                    for i, output in enumerate(["x" * 2000, "small", "y" * 300]))
+    parts = split_frames(bounded_view(text, 800), "abc123", 3)
+    assert parts[0][1] is None and "omitted" in parts[0][0]
+    assert "small" not in parts[0][0]
+    assert parts[1:] == [("small", 0), ("y" * 300, 0)]
+
+
+def test_split_frames_ignores_other_batches():
+    text = framed_run(sub_token("ffff00", 0), "old", 1) + framed_run(sub_token("abc123", 0), "new", 0)
+    assert split_frames(text, "abc123", 1) == [("new", 0)]
@@ -0,0 +1,92 @@
+import os
+import pytest
+from core.utils.output_capture import OutputCapture, OutputStore, bounded_view, default_max_output
+
+
+def test_short_output_is_kept_whole():
+    capture = OutputCapture(10)
+    capture.add("short")
+    assert capture.view() == "short"
+    assert capture.omitted == 0
+
+
+def test_long_output_keeps_head_and_tail():
+    capture = OutputCapture(10)
+    capture.add("abcdefghij")
+    capture.add("klmnopqrst")
+    assert capture.omitted == 10
+    view = capture.view()
+    assert view.startswith("abcde\n")
+    assert view.endswith("\npqrst")
+    assert "10 of 20 characters omitted" in view
+
+
+def test_limits_count_characters_not_bytes():
+    capture = OutputCapture(4)
+    capture.feed("éééé".encode('utf-8'))
+    assert capture.length == 4
+    assert capture.view() == "éééé"
+
+
+def test_feed_decodes_split_multibyte_sequences():
+    capture = OutputCapture()
+    data = "naïve".encode('utf-8')
+    assert capture.feed(data[:3]) == "na"
+    assert capture.feed(data[3:]) == "ïve"
+    assert capture.view() == "naïve"
+
+
+def test_view_up_to_offset():
+    capture = OutputCapture(6)
+    capture.add("0123456789")
+    assert capture.view(end=8).endswith("\n7")
+
+
+def test_bounded_view_matches_capture():
+    assert bounded_view("x" * 5, 10) == "x" * 5
+    assert "2 of 12 characters omitted" in bounded_view("a" * 5 + "bb" + "c" * 5, 10)
+
+
+def test_store_spills_and_reads_character_ranges(tmp_path):
+    store = OutputStore(str(tmp_path / "out"))
+    capture = store.new_capture(4)
+    capture.feed("ééabcdef".encode('utf-8'))
+    capture.close()
+    assert "full text is output #1" in capture.view()
+    assert store.read(1) == "ééabcdef"
+    assert store.read(1, 1, 4) == "éab"
+    assert store.read(1, 100) == ""
+
+
+def test_store_close_removes_spilled_outputs(tmp_path):
+    store = OutputStore(str(tmp_path / "out"))
+    capture = store.new_capture(1)
+    capture.add("spilled")
+    capture.close()
+    assert os.path.exists(store.path(1))
+    store.close()
+    assert not os.path.exists(store.directory)
+    assert store.read(1) == ""
+
+
+def test_output_within_limit_never_touches_disk(tmp_path):
+    store = OutputStore(str(tmp_path / "out"))
+    capture = store.new_capture(100)
+    capture.add("fits")
+    capture.close()
+    assert not os.path.exists(store.directory)
+
+
+def test_limit_below_one_is_rejected(monkeypatch):
+    with pytest.raises(ValueError):
+        OutputCapture(0)
+    monkeypatch.setenv('MAX_OUTPUT', '0')
+    with pytest.raises(ValueError):
+        default_max_output()
+
+
+def test_limit_of_one_stays_bounded():
+    capture = OutputCapture(1)
+    capture.add("abcdef")
+    assert capture.view().endswith("\nf")
+    assert capture.omitted == 5
@@ -0,0 +1,41 @@
+from core.models.prompt import PrivEscPrompt
+
+
+def record_turns(prompt, count):
+    for i in range(count):
+        prompt.add_command_history(f"cat /etc/file{i}")
+        prompt.add_avoid(f"Command 'ls /nope{i}' returned empty output.")
+        prompt.set_last_turn(f"cat /etc/file{i}", "data", f"Command 'cat /etc/file{i}' returned output:\n" + "x" * 100)
+        yield prompt.generate_parts()
+
+
+def test_prefix_only_grows_without_budget():
+    prompt = PrivEscPrompt('user', 'pass', 'linux', 'root')
+    prompt.add_hint("BEROOT SCAN FINDINGS")
+    previous = ""
+    for stable, history, _ in record_turns(prompt, 30):
+        assert (stable + history).startswith(previous)
+        previous = stable + history
+
+
+def test_budget_compacts_history_rarely():
+    prompt = PrivEscPrompt('user', 'pass', 'linux', 'root', token_budget=2000)
+    previous, rewrites = "", 0
+    for stable, history, volatile in record_turns(prompt, 100):
+        rewrites += not (stable + history).startswith(previous)
+        previous = stable + history
+        assert len(history) // 4 <= 2000 * 0.30 + 1
+    assert 0 < rewrites <= 15
+    assert "### Avoid" in volatile
+
+
+def test_repeated_command_is_not_moved_into_system_information():
+    prompt = PrivEscPrompt('user', 'pass', 'linux', 'root')
+    info = "Command 'id' returned output:\nuid=1"
+    prompt.set_last_turn("id", "uid=1", info)
+    prompt.set_last_turn("id", "uid=1", info)
+    assert info not in prompt.system_info
+    assert prompt.last_info == info
+
+    prompt.set_last_turn("whoami", "user", "Command 'whoami' returned output:\nuser")
+    assert list(prompt.system_info) == [info]
@@ -0,0 +1,59 @@
+import time
+import pytest
+from core.utils.rate_limiter import RateLimiter, TokenBucket
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(per_minute=60)
+    now = bucket.updated
+    assert bucket.wait_time(60, now) == 0
+    bucket.consume(60)
+    assert bucket.wait_time(1, now) == pytest.approx(1.0)
+    assert bucket.wait_time(1, now + 1.0) == pytest.approx(0.0)
+
+
+def test_unlimited_bucket_never_waits():
+    bucket = TokenBucket()
+    bucket.consume(10 ** 9)
+    assert bucket.wait_time(10 ** 9, time.monotonic()) == 0
+
+
+@pytest.mark.parametrize("headers, expected", [
+    ({'retry-after': '2'}, 2.0),
+    ({'retry-after-ms': '1500', 'retry-after': '9'}, 1.5),
+    ({}, None),
+    ({'retry-after': 'soon'}, None),
+])
+def test_retry_after_headers(headers, expected):
+    limiter = RateLimiter()
+    assert limiter.update_from_headers(headers) == expected
+    if expected:
+        assert limiter.blocked_until - time.monotonic() == pytest.approx(expected, abs=0.1)
+
+
+def test_exhausted_remaining_blocks_until_reset():
+    limiter = RateLimiter(requests_per_minute=100)
+    limiter.update_from_headers({
+        'x-ratelimit-remaining-requests': '0',
+        'x-ratelimit-reset-requests': '6m0s',
+    })
+    assert limiter._reserve(0) == pytest.approx(360, abs=1)
+
+
+def test_parse_duration():
+    limiter = RateLimiter()
+    assert limiter._parse_duration('20ms') == pytest.approx(0.02)
+    assert limiter._parse_duration('1m30s') == pytest.approx(90)
+    assert limiter._parse_duration('2.5') == 2.5
+
+
+def test_for_provider_shares_one_limiter():
+    assert RateLimiter.for_provider('test-shared') is RateLimiter.for_provider('test-shared')
+
+
+def test_acquire_spaces_requests():
+    limiter = RateLimiter(requests_per_minute=600)  # One request per 0.1s once the burst is spent
+    limiter.requests.level = 0
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.09
@@ -0,0 +1,63 @@
+from core.utils.output_capture import OutputCapture
+from core.utils.receive_buffer import (ReceiveBuffer, TAIL_OVERLAP, TRAILING_PASSWORD,
+                                       TRAILING_PROMPT)
+
+
+def test_prompt_ends_the_wait_with_its_offset():
+    buffer = ReceiveBuffer()
+    assert buffer.feed(b"uid=0(root)\n") is None
+    kind, offset, _ = buffer.feed(b"root@box:~# ")
+    assert kind == 'prompt'
+    assert buffer.text(offset) == "uid=0(root)\nroot@box:~"
+
+
+def test_prompt_split_across_chunks_is_found():
+    buffer = ReceiveBuffer()
+    assert buffer.feed(b"output >>") is None
+    kind, offset, _ = buffer.feed(b"> ")
+    assert kind == 'prompt'
+    assert offset == len("output ")
+
+
+def test_password_only_wins_when_nothing_else_matches():
+    buffer = ReceiveBuffer()
+    kind, _, _ = buffer.feed(b"Password: ")
+    assert kind == 'password'
+
+    buffer = ReceiveBuffer()
+    kind, _, _ = buffer.feed(b"Password: wrong\nsu: failure\n$ ")
+    assert kind == 'prompt'
+
+
+def test_old_data_beyond_the_overlap_is_not_rescanned():
+    buffer = ReceiveBuffer()
+    assert buffer.feed(b"x" * TAIL_OVERLAP) is None
+    assert len(buffer.tail) == TAIL_OVERLAP
+    assert buffer.feed(b"more") is None
+    assert buffer.tail.endswith("more")
+
+
+def test_match_tail_reports_absolute_offsets():
+    buffer = ReceiveBuffer(TRAILING_PROMPT)
+    buffer.feed(b"a" * 200)
+    buffer.feed(b"\n$ ")
+    kind, offset, _ = buffer.match_tail(TRAILING_PROMPT)
+    assert kind == 'prompt'
+    assert offset == 201
+
+
+def test_match_tail_only_sees_trailing_password_prompts():
+    buffer = ReceiveBuffer()
+    buffer.feed(b"su: Password: ")
+    assert buffer.match_tail(TRAILING_PASSWORD)[0] == 'password'
+    buffer.feed(b"\nnot asking any more\n")
+    assert buffer.match_tail(TRAILING_PASSWORD) is None
+
+
+def test_bounded_capture_keeps_offsets_in_the_full_stream():
+    buffer = ReceiveBuffer(capture=OutputCapture(10))
+    buffer.feed(b"0123456789" * 10)
+    kind, offset, _ = buffer.feed(b"\n$ ")
+    assert kind == 'prompt'
+    assert offset == 101
+    assert len(buffer) == 103
@@ -0,0 +1,26 @@
+import asyncio
+import time
+from core.ai.scripted_client import ScriptedClient
+
+RESPONSE = "Let me check.\n```bash\nid\n```\nThen more text that is never read."
+
+
+def test_async_stream_matches_sync_stream():
+    sync = ScriptedClient(responses=[RESPONSE], stream=True).get_response("", "")
+    result = asyncio.run(ScriptedClient(responses=[RESPONSE], stream=True).aget_response("", ""))
+    assert result == sync
+    assert result.endswith("```")
+
+
+def test_async_stream_does_not_block_the_event_loop():
+    clients = [ScriptedClient(responses=[RESPONSE], stream=True, token_delay=0.02) for _ in range(5)]
+
+    async def run_all():
+        return await asyncio.gather(*(client.aget_response("", "") for client in clients))
+
+    started = time.monotonic()
+    results = asyncio.run(run_all())
+    elapsed = time.monotonic() - started
+    assert len(set(results)) == 1
+    # Each stream sleeps ~0.12s in total; run one after another they would take ~0.6s
+    assert elapsed < 0.4
@@ -0,0 +1,50 @@
+import os
+from core.commands.local_command import LocalCommand
+from core.commands.scripted_command import ScriptedCommand
+from core.scanners.tool_cache import ToolCache
+
+
+def make_cache(tmp_path):
+    return ToolCache(str(tmp_path / "index.json"), str(tmp_path / "remote"))
+
+
+def test_resolve_places_a_single_file_under_its_hash(tmp_path):
+    script = tmp_path / "linpeas.sh"
+    script.write_text("echo scan\n")
+    target = make_cache(tmp_path).resolve(LocalCommand(), str(script))
+    assert target.startswith(str(tmp_path / "remote"))
+    assert target.endswith("/linpeas.sh")
+    with open(target) as f:
+        assert f.read() == "echo scan\n"
+
+
+def test_resolve_places_a_directory_under_its_hash(tmp_path):
+    tool = tmp_path / "BeRoot"
+    tool.mkdir()
+    (tool / "beroot.py").write_text("print('ok')\n")
+    target = make_cache(tmp_path).resolve(LocalCommand(), str(tool))
+    assert target.endswith("/BeRoot")
+    assert os.path.exists(os.path.join(target, "beroot.py"))
+
+
+
+def scripted_host(present: bool) -> ScriptedCommand:
+    output = "present" if present else ""
+    return ScriptedCommand(patterns=[{"match": r"^test -e ", "output": output}])
+
+
+def test_resolve_uses_a_bundle_placed_by_someone_else(tmp_path):
+    script = tmp_path / "linpeas.sh"
+    script.write_text("echo scan\n")
+    executor = scripted_host(present=True)
+    target = make_cache(tmp_path).resolve(executor, str(script))
+    assert executor.uploads == []
+    assert target.endswith("/linpeas.sh")
+
+
+def test_resolve_uploads_a_missing_bundle_once(tmp_path):
+    script = tmp_path / "linpeas.sh"
+    script.write_text("echo scan\n")
+    executor = scripted_host(present=False)
+    target = make_cache(tmp_path).resolve(executor, str(script))
+    assert executor.uploads == [(str(script), target)]
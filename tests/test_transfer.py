@@ -0,0 +1,60 @@
+import io
+import os
+import tarfile
+from core.commands.transfer import UploadPlan, manifest_hash
+
+
+def make_tree(root):
+    os.makedirs(root / "tool" / "sub")
+    (root / "tool" / "run.sh").write_text("echo run\n")
+    (root / "tool" / "sub" / "data.txt").write_text("data\n")
+    return str(root / "tool")
+
+
+def test_manifest_hash_is_stable(tmp_path):
+    tool = make_tree(tmp_path)
+    assert manifest_hash(tool) == manifest_hash(tool)
+    assert len(manifest_hash(tool)) == 64
+
+
+def test_manifest_hash_changes_with_content_and_mode(tmp_path):
+    tool = make_tree(tmp_path)
+    script = os.path.join(tool, "run.sh")
+    before = manifest_hash(tool)
+
+    os.chmod(script, 0o755)
+    after_chmod = manifest_hash(tool)
+    assert after_chmod != before
+
+    with open(script, 'a') as f:
+        f.write("echo more\n")
+    assert manifest_hash(tool) != after_chmod
+
+
+def test_manifest_hash_ignores_location(tmp_path):
+    first = make_tree(tmp_path / "a")
+    second = make_tree(tmp_path / "b")
+    assert manifest_hash(first) == manifest_hash(second)
+
+
+def test_plan_for_directory_extracts_under_remote_path(tmp_path):
+    plan = UploadPlan(make_tree(tmp_path), "/tmp/tools")
+    assert plan.extract_dir == "/tmp/tools"
+    assert plan.target == "/tmp/tools/tool"
+    assert plan.manifest_path == "/tmp/tools/.tool.manifest"
+    assert plan.digest in plan.extract_command()
+    assert plan.check_command().startswith("test -e /tmp/tools/tool")
+
+
+def test_plan_for_file_becomes_remote_path(tmp_path):
+    script = os.path.join(make_tree(tmp_path), "run.sh")
+    plan = UploadPlan(script, "/tmp/x/linpeas.sh")
+    assert plan.target == "/tmp/x/linpeas.sh"
+    assert plan.manifest_path == "/tmp/x/.linpeas.sh.manifest"
+
+
+def test_archive_holds_the_tree_under_its_name(tmp_path):
+    plan = UploadPlan(make_tree(tmp_path), "/tmp/tools")
+    with tarfile.open(fileobj=io.BytesIO(plan.archive()), mode='r:gz') as tar:
+        names = sorted(tar.getnames())
+    assert names == ["tool", "tool/run.sh", "tool/sub", "tool/sub/data.txt"]